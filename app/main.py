@@ -1,20 +1,26 @@
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
 
 # Import all route modules
 from app.routes import auth, patients, analysis, translation  # ✅ Added translation here
-from database import init_db
+from database import init_db, close_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Directories required at runtime (static/ holds voice/audio files)
+_REQUIRED_DIRS = ("uploads", "ml_models", "app/services", "app/utils", "static")
+
 app = FastAPI(
     title="Blood Analysis System API",
     description="Comprehensive blood report analysis with 26 parameters",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -26,31 +32,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses (analysis results, history)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(patients.router)
 app.include_router(analysis.router)
 app.include_router(translation.router)  # ✅ Added translation router
 
-# Create necessary directories
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("ml_models", exist_ok=True)
-os.makedirs("app/services", exist_ok=True)
-os.makedirs("app/utils", exist_ok=True)
-os.makedirs("static", exist_ok=True)  # ✅ for voice/audio files
-
 # Mount static files (for uploads and generated audio)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-app.mount("/static", StaticFiles(directory="static"), name="static")  # ✅ Added this line
+# Directories are created at startup, so skip the existence check at import
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
+app.mount("/static", StaticFiles(directory="static", check_dir=False), name="static")  # ✅ Added this line
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
+    # Set CREATE_DIRS=0 when directories are provisioned ahead of time (e.g. in the image)
+    if os.getenv("CREATE_DIRS", "1") != "0":
+        for d in _REQUIRED_DIRS:
+            os.makedirs(d, exist_ok=True)
+    
     try:
         init_db()
         logger.info("✅ Database initialized successfully")
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
+    
+    # Expired revocations are pruned here rather than on every logout
+    try:
+        auth.prune_revoked_tokens()
+    except Exception as e:
+        logger.error(f"Pruning revoked tokens failed: {e}")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Release database sessions on shutdown"""
+    close_db()
 
 @app.get("/")
 async def root():
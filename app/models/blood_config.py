@@ -1,7 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, Mapping
+from types import MappingProxyType
+import numpy as np
 
-# Normal ranges for ALL 26 blood parameters
-NORMAL_RANGES: Dict[str, Dict[str, Any]] = {
+# Normal ranges for ALL 26 blood parameters (read-only, shared across requests)
+NORMAL_RANGES: Mapping[str, Dict[str, Any]] = MappingProxyType({
     'WBC': {'min': 4.5, 'max': 10.0, 'unit': '×10⁹/L', 'critical_low': 2.0, 'critical_high': 30.0},
     'RBC': {'min': 4.2, 'max': 5.4, 'unit': '×10⁶/µL', 'critical_low': 3.0, 'critical_high': 6.0},
     'HGB': {'min': 12.0, 'max': 16.0, 'unit': 'g/dL', 'critical_low': 8.0, 'critical_high': 18.0},
@@ -28,7 +30,7 @@ NORMAL_RANGES: Dict[str, Dict[str, Any]] = {
     'LFR': {'min': 87.0, 'max': 91.4, 'unit': '%', 'critical_low': 80.0, 'critical_high': 95.0},
     'MFR': {'min': 11.0, 'max': 18.0, 'unit': '%', 'critical_low': 8.0, 'critical_high': 25.0},
     'HFR': {'min': 0.0, 'max': 1.7, 'unit': '%', 'critical_low': 0.0, 'critical_high': 3.0}
-}
+})
 
 # Disease patterns using ALL relevant parameters
 DISEASE_PATTERNS = {
@@ -112,10 +114,17 @@ SEVERITY_LEVELS = {
     'Critical': (0.8, 1.0)
 }
 
-# All 26 parameters in fixed order for ML model
-ALL_PARAMETERS = [
+# All 26 parameters in fixed order for ML model (immutable; shared by API, preprocessing and training)
+ALL_PARAMETERS = (
     'WBC', 'RBC', 'HGB', 'HCT', 'MCV', 'MCH', 'MCHC', 'PLT',
     'RDW_SD', 'RDW_CV', 'PDW', 'MPV', 'P_LCR', 'PCT', 'NEUT',
     'LYMPH', 'MONO', 'EO', 'BASO', 'IG', 'NRBCS', 'RETICULOCYTES',
     'IRF', 'LFR', 'MFR', 'HFR'
-]
\ No newline at end of file
+)
+
+# Database column / BloodParameters field names aligned with ALL_PARAMETERS
+PARAM_FIELD_NAMES = tuple(p.lower() for p in ALL_PARAMETERS)
+
+# Range vectors aligned with ALL_PARAMETERS for vectorized range checks
+MIN_ARR = np.array([NORMAL_RANGES[p]['min'] for p in ALL_PARAMETERS], dtype=np.float64)
+MAX_ARR = np.array([NORMAL_RANGES[p]['max'] for p in ALL_PARAMETERS], dtype=np.float64)
\ No newline at end of file
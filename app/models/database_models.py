@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Optional, List
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -15,8 +15,7 @@ class User(UserBase):
     user_id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PatientBase(BaseModel):
     name: str
@@ -32,10 +31,11 @@ class Patient(PatientBase):
     patient_id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BloodParameters(BaseModel):
+    model_config = ConfigDict(from_attributes=True, extra='ignore')
+    
     wbc: Optional[float] = None
     rbc: Optional[float] = None
     hgb: Optional[float] = None
@@ -73,8 +73,7 @@ class AnalysisResult(AnalysisResultCreate):
     severity_level: Optional[str] = None
     risk_score: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class DiseasePrediction(BaseModel):
     disease_name: str
@@ -97,7 +96,6 @@ class AnalysisResponse(BaseModel):
     severity_level: str
     risk_score: float
     recommendations: List[Recommendation]
-    normal_ranges: Dict[str, Any]
 
 class Token(BaseModel):
     access_token: str
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import text
-from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+from cachetools import TTLCache
+import hashlib
 import logging
 
 from app.models.database_models import User, UserCreate, Token
-from app.utils.auth import verify_password, get_password_hash, create_access_token, verify_token
+from app.utils.auth import verify_and_update_password, get_password_hash, create_access_token, verify_token
+from config import config
 from database import db
 
 logger = logging.getLogger(__name__)
@@ -13,6 +19,73 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Resolved (user, token expiry) keyed by token digest; repeat requests with the same
+# token skip both JWT decoding and the DB lookup for up to the TTL
+_USER_CACHE = TTLCache(maxsize=10_000, ttl=60)
+
+# Digests of tokens this process knows are revoked, kept no longer than a token can live. Filled by
+# logout and by the revoked_tokens check on each user-cache miss, so a logout handled by another
+# worker takes effect here once this worker's cached entry for the token (at most 60s old) lapses
+_REVOKED_TOKENS = TTLCache(maxsize=100_000, ttl=config.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# SQL statements (built once at import); explicit columns keep the hash off the common read path
+_SELECT_USER_SQL = text("""
+    SELECT user_id, username, email, full_name, language_pref, created_at
+    FROM users WHERE username = :username
+""")
+
+_SELECT_LOGIN_SQL = text("""
+    SELECT username, password_hash
+    FROM users WHERE username = :username
+""")
+
+_UPDATE_PASSWORD_HASH_SQL = text("""
+    UPDATE users SET password_hash = :password_hash WHERE username = :username
+""")
+
+_SELECT_REVOKED_SQL = text("""
+    SELECT 1 FROM revoked_tokens WHERE token_digest = :token_digest
+""")
+
+_INSERT_REVOKED_SQL = text("""
+    INSERT INTO revoked_tokens (token_digest, expires_at) VALUES (:token_digest, :expires_at)
+""")
+
+_DELETE_EXPIRED_REVOKED_SQL = text("""
+    DELETE FROM revoked_tokens WHERE expires_at < SYS_EXTRACT_UTC(SYSTIMESTAMP)
+""")
+
+_INSERT_USER_SQL = text("""
+    INSERT INTO users (username, email, password_hash, full_name, language_pref)
+    VALUES (:username, :email, :password_hash, :full_name, :language_pref)
+    RETURNING user_id, created_at
+""")
+
+def _token_key(token: str) -> bytes:
+    """Short digest of a bearer token for use as a cache key"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def invalidate_token(token: str):
+    """Drop a token's cached user so the next request re-verifies it"""
+    _USER_CACHE.pop(_token_key(token), None)
+
+def _revoke(token_key: bytes, expires_at: datetime):
+    """Record a token digest as revoked until its expiry (blocking)"""
+    with db.get_connection() as conn:
+        try:
+            conn.execute(_INSERT_REVOKED_SQL, {"token_digest": token_key, "expires_at": expires_at})
+        except IntegrityError:
+            pass  # Already revoked by an earlier logout
+        conn.commit()
+    _REVOKED_TOKENS[token_key] = True
+
+def prune_revoked_tokens():
+    """Delete revoked_tokens rows whose tokens have expired anyway; run at startup (blocking)"""
+    with db.get_connection() as conn:
+        deleted = conn.execute(_DELETE_EXPIRED_REVOKED_SQL).rowcount
+        conn.commit()
+    logger.info("Pruned %s expired revoked tokens", deleted)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Dependency to get current user from token"""
     credentials_exception = HTTPException(
@@ -21,6 +94,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    cache_key = _token_key(token)
+    if cache_key in _REVOKED_TOKENS:
+        _USER_CACHE.pop(cache_key, None)
+        raise credentials_exception
+    
+    cached = _USER_CACHE.get(cache_key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return user
+        _USER_CACHE.pop(cache_key, None)
+    
     payload = verify_token(token)
     if payload is None:
         raise credentials_exception
@@ -30,72 +115,85 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
     
     try:
-        with db.get_connection() as conn:
-            result = conn.execute(
-                text("SELECT * FROM users WHERE username = :username"),
-                {"username": username}
-            )
-            user_data = result.fetchone()
+        # Run the blocking lookups off the event loop
+        revoked, user_data = await asyncio.to_thread(_fetch_user_row, username, cache_key)
         
+        if revoked:
+            _REVOKED_TOKENS[cache_key] = True
+            raise credentials_exception
         if user_data is None:
             raise credentials_exception
         
-        return User(
-            user_id=user_data[0],
-            username=user_data[1],
-            email=user_data[2],
-            full_name=user_data[4],
-            language_pref=user_data[5],
-            created_at=user_data[6]
-        )
+        user = User.model_validate(user_data)
+        _USER_CACHE[cache_key] = (user, payload.get("exp"))
+        return user
     except Exception as e:
-        logger.error(f"Error getting current user: {e}")
+        logger.error("Error getting current user: %s", e)
         raise credentials_exception
 
+def _fetch_user_row(username: str, token_key: bytes):
+    """Return (token revoked by a logout, users row for username) on one connection (blocking)"""
+    with db.get_connection() as conn:
+        if conn.execute(_SELECT_REVOKED_SQL, {"token_digest": token_key}).first() is not None:
+            return True, None
+        result = conn.execute(_SELECT_USER_SQL, {"username": username})
+        return False, result.mappings().first()
+
 @router.get("/me", response_model=User)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    """Revoke this token until it expires and forget its cached user"""
+    payload = verify_token(token)
+    # An invalid or expired token is already unusable; there is nothing to revoke
+    if payload is not None and payload.get("exp") is not None:
+        # revoked_tokens.expires_at is a plain TIMESTAMP in UTC
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+        try:
+            await asyncio.to_thread(_revoke, _token_key(token), expires_at)
+        except Exception as e:
+            logger.error("Logout error: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Logout failed"
+            )
+    invalidate_token(token)
+    return {"message": "Logged out successfully"}
+
+# signup/login do blocking DB I/O and password hashing, so they are plain `def`
+# and FastAPI runs them in its threadpool instead of on the event loop
 @router.post("/signup", response_model=User)
-async def signup(user_data: UserCreate):
+def signup(user_data: UserCreate):
     """Register new user"""
     try:
+        hashed_password = get_password_hash(user_data.password)
+        
         with db.get_connection() as conn:
-            # Check if user already exists
-            result = conn.execute(
-                text("SELECT user_id FROM users WHERE username = :username OR email = :email"),
-                {"username": user_data.username, "email": user_data.email}
-            )
-            existing_user = result.fetchone()
-            
-            if existing_user:
+            # Create new user; the UNIQUE constraints on username/email reject duplicates atomically
+            try:
+                result = conn.execute(
+                    _INSERT_USER_SQL,
+                    {
+                        "username": user_data.username,
+                        "email": user_data.email,
+                        "password_hash": hashed_password,
+                        "full_name": user_data.full_name,
+                        "language_pref": user_data.language_pref
+                    }
+                )
+            except IntegrityError:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username or email already registered"
                 )
-            
-            # Create new user
-            hashed_password = get_password_hash(user_data.password)
-            result = conn.execute(
-                text("""
-                    INSERT INTO users (username, email, password_hash, full_name, language_pref)
-                    VALUES (:username, :email, :password_hash, :full_name, :language_pref)
-                    RETURNING user_id, created_at
-                """),
-                {
-                    "username": user_data.username,
-                    "email": user_data.email,
-                    "password_hash": hashed_password,
-                    "full_name": user_data.full_name,
-                    "language_pref": user_data.language_pref
-                }
-            )
             new_user = result.fetchone()
             user_id = new_user[0]
             created_at = new_user[1]
             conn.commit()
         
-        logger.info(f"New user registered: {user_data.username}")
+        logger.info("New user registered: %s", user_data.username)
         return User(
             user_id=user_id,
             username=user_data.username,
@@ -107,41 +205,50 @@ async def signup(user_data: UserCreate):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Signup error: {e}")
+        logger.error("Signup error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed"
         )
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """User login"""
     try:
         with db.get_connection() as conn:
-            result = conn.execute(
-                text("SELECT * FROM users WHERE username = :username"),
-                {"username": form_data.username}
-            )
-            user_data = result.fetchone()
+            result = conn.execute(_SELECT_LOGIN_SQL, {"username": form_data.username})
+            user_data = result.mappings().first()
         
-        if not user_data or not verify_password(form_data.password, user_data[3]):
+        password_hash = user_data["password_hash"] if user_data else None
+        valid, new_hash = verify_and_update_password(form_data.password, password_hash)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Migrate legacy bcrypt hashes to argon2id now that the plain password is known
+        if new_hash:
+            try:
+                with db.get_connection() as conn:
+                    conn.execute(_UPDATE_PASSWORD_HASH_SQL, {"password_hash": new_hash, "username": user_data["username"]})
+                    conn.commit()
+                logger.info("Password hash upgraded for user: %s", user_data['username'])
+            except Exception as e:
+                logger.warning("Password rehash failed for %s: %s", user_data['username'], e)
+        
         access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user_data[1]}, expires_delta=access_token_expires
+            data={"sub": user_data["username"]}, expires_delta=access_token_expires
         )
         
-        logger.info(f"User logged in: {form_data.username}")
+        logger.info("User logged in: %s", form_data.username)
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Login failed"
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from sqlalchemy import text
+from sqlalchemy import Integer, bindparam, text
 import logging
 
 from app.models.database_models import Patient, PatientCreate, User
@@ -11,17 +11,34 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
+# SQL statements (built once at import)
+_INSERT_PATIENT_SQL = text("""
+    INSERT INTO patients (user_id, name, age, gender, email, phone)
+    VALUES (:user_id, :name, :age, :gender, :email, :phone)
+    RETURNING patient_id, created_at
+""").bindparams(bindparam('user_id', type_=Integer))
+
+# Single query returns every field the response needs; nothing is loaded per patient
+_SELECT_PATIENTS_SQL = text("""
+    SELECT patient_id, name, age, gender, email, phone, created_at
+    FROM patients WHERE user_id = :user_id ORDER BY created_at DESC
+""").bindparams(bindparam('user_id', type_=Integer))
+
+_SELECT_PATIENT_SQL = text("""
+    SELECT patient_id, name, age, gender, email, phone, created_at
+    FROM patients WHERE patient_id = :patient_id AND user_id = :user_id
+""").bindparams(bindparam('patient_id', type_=Integer), bindparam('user_id', type_=Integer))
+
+# Handlers below do blocking DB I/O only, so they are plain `def` and FastAPI runs
+# them in its threadpool instead of on the event loop
+
 @router.post("/", response_model=Patient)
-async def create_patient(patient: PatientCreate, current_user: User = Depends(get_current_user)):
+def create_patient(patient: PatientCreate, current_user: User = Depends(get_current_user)):
     """Create new patient"""
     try:
         with db.get_connection() as conn:
             result = conn.execute(
-                text("""
-                    INSERT INTO patients (user_id, name, age, gender, email, phone)
-                    VALUES (:user_id, :name, :age, :gender, :email, :phone)
-                    RETURNING patient_id, created_at
-                """),
+                _INSERT_PATIENT_SQL,
                 {
                     "user_id": current_user.user_id,
                     "name": patient.name,
@@ -52,28 +69,17 @@ async def create_patient(patient: PatientCreate, current_user: User = Depends(ge
         )
 
 @router.get("/", response_model=List[Patient])
-async def get_patients(current_user: User = Depends(get_current_user)):
+def get_patients(current_user: User = Depends(get_current_user)):
     """Get all patients for current user"""
     try:
         with db.get_connection() as conn:
             result = conn.execute(
-                text("SELECT * FROM patients WHERE user_id = :user_id ORDER BY created_at DESC"),
+                _SELECT_PATIENTS_SQL,
                 {"user_id": current_user.user_id}
             )
-            patients = result.fetchall()
+            patients = result.mappings().all()
         
-        return [
-            Patient(
-                patient_id=row[0],
-                name=row[2],
-                age=row[3],
-                gender=row[4],
-                email=row[5],
-                phone=row[6],
-                created_at=row[7]
-            )
-            for row in patients
-        ]
+        return [Patient.model_validate(row) for row in patients]
     except Exception as e:
         logger.error(f"Get patients error: {e}")
         raise HTTPException(
@@ -82,28 +88,20 @@ async def get_patients(current_user: User = Depends(get_current_user)):
         )
 
 @router.get("/{patient_id}", response_model=Patient)
-async def get_patient(patient_id: int, current_user: User = Depends(get_current_user)):
+def get_patient(patient_id: int, current_user: User = Depends(get_current_user)):
     """Get specific patient"""
     try:
         with db.get_connection() as conn:
             result = conn.execute(
-                text("SELECT * FROM patients WHERE patient_id = :patient_id AND user_id = :user_id"),
+                _SELECT_PATIENT_SQL,
                 {"patient_id": patient_id, "user_id": current_user.user_id}
             )
-            patient_data = result.fetchone()
+            patient_data = result.mappings().first()
         
         if not patient_data:
             raise HTTPException(status_code=404, detail="Patient not found")
         
-        return Patient(
-            patient_id=patient_data[0],
-            name=patient_data[2],
-            age=patient_data[3],
-            gender=patient_data[4],
-            email=patient_data[5],
-            phone=patient_data[6],
-            created_at=patient_data[7]
-        )
+        return Patient.model_validate(patient_data)
     except HTTPException:
         raise
     except Exception as e:
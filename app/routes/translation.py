@@ -14,6 +14,15 @@ def translate_text(payload: dict):
     translated = translator.translate_text(text, target_lang)
     return {"translated": translated}
 
+@router.post("/batch")
+def translate_batch(payload: dict):
+    texts = payload.get("texts", [])
+    target_lang = payload.get("lang", "en")
+    if not isinstance(texts, list):
+        raise HTTPException(status_code=400, detail="texts must be a list")
+    translated = translator.translate_batch(texts, target_lang)
+    return {"translated": translated}
+
 @router.post("/speak")
 def speak_text(payload: dict):
     text = payload.get("text", "")
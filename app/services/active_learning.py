@@ -16,38 +16,31 @@ class ActiveLearning:
         if not hasattr(self.model, 'is_trained') or not self.model.is_trained:
             return self._select_diverse_samples(unlabeled_data, n_samples)
         
-        uncertainties = self._calculate_uncertainty(unlabeled_data)
+        uncertainties = np.asarray(self._calculate_uncertainty(unlabeled_data))
         
-        unlabeled_data = unlabeled_data.copy()
-        unlabeled_data['uncertainty'] = uncertainties
-        selected_samples = unlabeled_data.nlargest(n_samples, 'uncertainty')
+        # Partial selection of the top-n uncertainties (O(N)), then order just those
+        if n_samples < len(uncertainties):
+            top_idx = np.argpartition(-uncertainties, n_samples)[:n_samples]
+        else:
+            top_idx = np.arange(len(uncertainties))
+        top_idx = top_idx[np.argsort(-uncertainties[top_idx], kind='stable')]
+        
+        # Positional take already yields a new frame, so no extra copy is needed
+        selected_samples = unlabeled_data.iloc[top_idx].assign(uncertainty=uncertainties[top_idx])
         
         logger.info(f"Selected {len(selected_samples)} samples for labeling")
         return selected_samples
     
-    def _calculate_uncertainty(self, data: pd.DataFrame) -> List[float]:
-        """Calculate prediction uncertainty"""
-        uncertainties = []
-        
-        for _, row in data.iterrows():
-            try:
-                parameters = {k: v for k, v in row.items() 
-                            if not pd.isna(v) and k not in ['image_path', 'filename']}
-                
-                # Get prediction probabilities
-                predictions = self.model.predict(parameters)
-                if predictions:
-                    max_prob = max(prob for _, prob in predictions)
-                    uncertainty = 1 - max_prob
-                    uncertainties.append(uncertainty)
-                else:
-                    uncertainties.append(1.0)
-                    
-            except Exception as e:
-                logger.warning(f"Uncertainty calculation error: {e}")
-                uncertainties.append(1.0)
+    def _calculate_uncertainty(self, data: pd.DataFrame) -> np.ndarray:
+        """Calculate prediction uncertainty for all rows in one batched prediction"""
+        feature_data = data.loc[:, ~data.columns.isin(['image_path', 'filename'])]
         
-        return uncertainties
+        try:
+            probabilities = self.model.predict_batch(feature_data)
+            return 1.0 - probabilities.max(axis=1)
+        except Exception as e:
+            logger.warning(f"Uncertainty calculation error: {e}")
+            return np.ones(len(data))
     
     def _select_diverse_samples(self, data: pd.DataFrame, n_samples: int) -> pd.DataFrame:
         """Select diverse samples when no model is available"""
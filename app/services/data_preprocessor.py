@@ -1,75 +1,236 @@
 import os
+import re
+import hashlib
+import sqlite3
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, List, Tuple, Optional
-import json
+from typing import Dict, Iterable, List, Tuple, Optional
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+import multiprocessing
+import cv2
+from decimal import Decimal
 from .ocr_service import OCRService
 from .nlp_extractor import NLPExtractor
+from app.models.blood_config import ALL_PARAMETERS, MIN_ARR, MAX_ARR
 
 logger = logging.getLogger(__name__)
 
+# Normal range bounds in float32 to match the dataset's float32 parameter columns; comparing
+# float32 values against float64 bounds would flag e.g. a stored 0.1 as above a 0.1 maximum
+_MINS = MIN_ARR.astype(np.float32)
+_MAXS = MAX_ARR.astype(np.float32)
+
+# Cheap pre-filter: text without a digit and a common CBC term can't yield parameters
+_PARAM_TOKEN = re.compile(r'\b(?:HGB|Hb|MCV|PLT|WBC|RBC|HCT|MCH|MCHC|RDW|Hemoglobin|Platelets?)\b', re.IGNORECASE)
+_HAS_DIGIT = re.compile(r'\d')
+
+# Images handed to a worker process per task in process_dataset
+_POOL_CHUNKSIZE = 16
+
+# Rows per Parquet row group when streaming extracted features to disk
+_PARQUET_BATCH_ROWS = 1024
+
+# Same columns and dtypes as the DataFrame built by process_dataset
+_PARQUET_SCHEMA = pa.schema(
+    [('image_path', pa.string()), ('filename', pa.string())]
+    + [(param, pa.float32()) for param in ALL_PARAMETERS]
+    + [('extracted_text_length', pa.int32()), ('parameters_found', pa.int32())]
+)
+
+def _json_default(obj):
+    """orjson fallback for types it doesn't serialize natively (e.g. Decimal from Oracle NUMBER)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def iter_png_entries(root: str):
+    """Recursively yield os.DirEntry objects for the PNG files under root using os.scandir"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_png_entries(entry.path)
+            elif entry.name.lower().endswith('.png'):
+                yield entry
+
+def _iter_png_files(root: str):
+    """Recursively yield PNG file paths under root"""
+    for entry in iter_png_entries(root):
+        yield entry.path
+
+# Per-image results cache: blake2b of the image bytes -> extracted parameters (JSON), so reruns only
+# OCR new or changed images; bump the version when extraction changes so old rows stop matching
+_FEATURES_CACHE_PATH = 'features_cache.db'
+_FEATURES_CACHE_VERSION = 1
+
+def _create_features_cache(path: str):
+    """Create the cache table and switch the file to WAL so pool workers can read while others write"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS features (digest BLOB PRIMARY KEY, parameters BLOB NOT NULL)')
+        conn.commit()
+    finally:
+        conn.close()
+
+def _image_digest(image_path: str) -> bytes:
+    """Content hash of an image file, salted with the cache version"""
+    h = hashlib.blake2b(f'v{_FEATURES_CACHE_VERSION}'.encode(), digest_size=16)
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.digest()
+
+# Per-process preprocessor used by pool workers (OCR service and NLP models load once per worker)
+_worker_preprocessor = None
+_worker_cache = None
+
+def _init_worker(cache_path: Optional[str] = None):
+    """Pool initializer: build this worker's DataPreprocessor and open its cache connection"""
+    global _worker_preprocessor, _worker_cache
+    # One OpenCV and one Tesseract thread per worker; the pool already spreads images across cores
+    cv2.setNumThreads(1)
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    _worker_preprocessor = DataPreprocessor()
+    _worker_cache = sqlite3.connect(cache_path, timeout=30, isolation_level=None) if cache_path else None
+
+def _extract_features_worker(image_path: str) -> Tuple[str, Dict[str, float]]:
+    """Pool task: extract one image with this worker's preprocessor, reusing cached results for unchanged images"""
+    if _worker_cache is None:
+        return _worker_preprocessor.extract_features_one(image_path)
+    
+    digest = _image_digest(image_path)
+    row = _worker_cache.execute('SELECT parameters FROM features WHERE digest = ?', (digest,)).fetchone()
+    if row is not None:
+        return image_path, orjson.loads(row[0])
+    
+    image_path, parameters = _worker_preprocessor.extract_features_one(image_path)
+    # Empty results are not cached; they may come from a transient OCR failure
+    if parameters:
+        _worker_cache.execute(
+            'INSERT OR REPLACE INTO features VALUES (?, ?)',
+            (digest, orjson.dumps(parameters, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY))
+        )
+    return image_path, parameters
+
 class DataPreprocessor:
     def __init__(self):
         self.ocr_service = OCRService()
         self.nlp_extractor = NLPExtractor()
         self.extracted_data = []
     
-    def process_dataset(self, dataset_path: str, output_csv: str = None) -> pd.DataFrame:
+    def process_dataset(self, dataset_path: str, output_path: str = None, max_workers: Optional[int] = None,
+                        cache_path: Optional[str] = _FEATURES_CACHE_PATH) -> pd.DataFrame:
         """Process all images in dataset and extract features"""
         logger.info(f"Processing dataset from {dataset_path}")
         
-        image_files = []
-        for root, dirs, files in os.walk(dataset_path):
-            for file in files:
-                if file.lower().endswith('.png'):
-                    image_files.append(os.path.join(root, file))
+        image_files = list(_iter_png_files(dataset_path))
         
         logger.info(f"Found {len(image_files)} PNG images")
         
-        results = []
-        for i, image_path in enumerate(image_files):
-            if i % 100 == 0:
-                logger.info(f"Processed {i}/{len(image_files)} images")
-            
-            try:
-                # Extract parameters from image
-                parameters = self.extract_parameters_from_image(image_path)
-                
-                if parameters:
-                    result = {
-                        'image_path': image_path,
-                        'filename': os.path.basename(image_path),
-                        **parameters
-                    }
-                    results.append(result)
-                    
-            except Exception as e:
-                logger.warning(f"Failed to process {image_path}: {e}")
-                continue
+        # Preallocate typed columns (at most one row per image), trimmed to the filled rows at the end
+        n_images = len(image_files)
+        columns = {
+            'image_path': np.empty(n_images, dtype=object),
+            'filename': np.empty(n_images, dtype=object)
+        }
+        columns.update({param: np.full(n_images, np.nan, dtype=np.float32) for param in ALL_PARAMETERS})
+        columns['extracted_text_length'] = np.zeros(n_images, dtype=np.int32)
+        columns['parameters_found'] = np.zeros(n_images, dtype=np.int32)
+        
+        n_rows = 0
+        for image_path, parameters in self._iter_parameters(image_files, max_workers, cache_path):
+            columns['image_path'][n_rows] = image_path
+            columns['filename'][n_rows] = os.path.basename(image_path)
+            for key, value in parameters.items():
+                if key in columns:
+                    columns[key][n_rows] = value
+            n_rows += 1
         
         # Create DataFrame
-        df = pd.DataFrame(results)
+        df = pd.DataFrame({name: values[:n_rows] for name, values in columns.items()})
         
-        # Save to CSV if requested
-        if output_csv:
-            df.to_csv(output_csv, index=False)
-            logger.info(f"Extracted data saved to {output_csv}")
+        # Save if requested: Parquet keeps the float32 columns typed and compact; CSV for anything else
+        if output_path:
+            if output_path.endswith('.parquet'):
+                df.to_parquet(output_path, index=False)
+            else:
+                df.to_csv(output_path, index=False)
+            logger.info(f"Extracted data saved to {output_path}")
         
         logger.info(f"Successfully processed {len(df)} images")
         return df
     
+    def write_dataset_parquet(self, dataset_path: str, output_path: str, batch_size: int = _PARQUET_BATCH_ROWS,
+                              max_workers: Optional[int] = None, cache_path: Optional[str] = _FEATURES_CACHE_PATH,
+                              image_files: Optional[Iterable[str]] = None) -> int:
+        """Stream extracted features for image_files (default: every PNG under dataset_path) into a Parquet file,
+        one row group per batch; returns rows written"""
+        logger.info(f"Processing dataset from {dataset_path}")
+        
+        # Paths stream straight from the directory walk into the pool; no up-front list of the tree
+        if image_files is None:
+            image_files = _iter_png_files(dataset_path)
+        n_rows = 0
+        batch = []
+        with pq.ParquetWriter(output_path, _PARQUET_SCHEMA) as writer:
+            for image_path, parameters in self._iter_parameters(image_files, max_workers, cache_path):
+                row = {name: parameters.get(name) for name in _PARQUET_SCHEMA.names}
+                row['image_path'] = image_path
+                row['filename'] = os.path.basename(image_path)
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=_PARQUET_SCHEMA))
+                    n_rows += len(batch)
+                    batch = []
+            if batch or n_rows == 0:
+                writer.write_table(pa.Table.from_pylist(batch, schema=_PARQUET_SCHEMA))
+                n_rows += len(batch)
+        
+        logger.info(f"Extracted data for {n_rows} images streamed to {output_path}")
+        return n_rows
+    
+    def _iter_parameters(self, image_files: Iterable[str], max_workers: Optional[int], cache_path: Optional[str] = None):
+        """Yield (image_path, parameters) for each image that yields parameters, in completion order"""
+        total = f"/{len(image_files)}" if hasattr(image_files, '__len__') else ""
+        if cache_path:
+            _create_features_cache(cache_path)
+        
+        # Each worker process builds its own preprocessor once; OCR and NLP both run in parallel,
+        # and unordered results keep slow images from holding up fast ones
+        with multiprocessing.Pool(max_workers or os.cpu_count(), initializer=_init_worker, initargs=(cache_path,)) as pool:
+            results = pool.imap_unordered(_extract_features_worker, image_files, chunksize=_POOL_CHUNKSIZE)
+            for i, (image_path, parameters) in enumerate(results):
+                if i % 100 == 0:
+                    logger.info(f"Processed {i}{total} images")
+                if parameters:
+                    yield image_path, parameters
+    
+    def extract_features_one(self, image_path: str) -> Tuple[str, Dict[str, float]]:
+        """OCR and extract one image, returning (image_path, parameters); parameters is empty on failure"""
+        return image_path, self.extract_parameters_from_image(image_path)
+    
     def extract_parameters_from_image(self, image_path: str) -> Dict[str, float]:
         """Extract blood parameters from PNG image"""
+        # Extract text from image
+        extracted_text = self.ocr_service.extract_text_from_image(image_path)
+        return self.extract_parameters_from_text(extracted_text, image_path)
+    
+    def extract_parameters_from_text(self, extracted_text: str, source: str = '') -> Dict[str, float]:
+        """Extract blood parameters from OCR text"""
         try:
-            # Extract text from image
-            extracted_text = self.ocr_service.extract_text_from_image(image_path)
-            
             if not extracted_text or len(extracted_text.strip()) < 10:
                 return {}
             
             # Clean and process text
             cleaned_text = self.nlp_extractor.clean_extracted_text(extracted_text)
             
+            # Skip NLP on pages that clearly contain no lab values
+            if not (_HAS_DIGIT.search(cleaned_text) and _PARAM_TOKEN.search(cleaned_text)):
+                return {}
+            
             # Extract parameters using NLP
             parameters = self.nlp_extractor.extract_parameters(cleaned_text)
             validated_parameters = self.nlp_extractor.validate_parameters(parameters)
@@ -81,20 +242,14 @@ class DataPreprocessor:
             return validated_parameters
             
         except Exception as e:
-            logger.error(f"Error extracting parameters from {image_path}: {e}")
+            logger.error(f"Error extracting parameters from {source}: {e}")
             return {}
     
     def generate_labels_automatically(self, df: pd.DataFrame) -> pd.DataFrame:
         """Generate initial labels based on parameter patterns"""
         logger.info("Generating automatic labels based on parameter patterns...")
         
-        labels = []
-        confidence_scores = []
-        
-        for _, row in df.iterrows():
-            label, confidence = self._predict_label_from_parameters(row.to_dict())
-            labels.append(label)
-            confidence_scores.append(confidence)
+        labels, confidence_scores = self._predict_labels_from_parameters(df)
         
         df['auto_label'] = labels
         df['confidence'] = confidence_scores
@@ -103,79 +258,56 @@ class DataPreprocessor:
         logger.info("Automatic labeling completed")
         return df
     
-    def _predict_label_from_parameters(self, parameters: Dict) -> Tuple[str, float]:
-        """Predict disease label based on parameter patterns"""
-        # Rule-based labeling for initial training data
-        hgb = parameters.get('HGB')
-        mcv = parameters.get('MCV')
-        plt = parameters.get('PLT')
-        wbc = parameters.get('WBC')
-        rbc = parameters.get('RBC')
-        
-        # Iron Deficiency Anemia
-        if hgb and mcv and hgb < 12 and mcv < 80:
-            return 'Iron Deficiency Anemia', 0.85
-        
-        # Vitamin B12 Deficiency
-        if hgb and mcv and hgb < 12 and mcv > 100:
-            return 'Vitamin B12 Deficiency', 0.80
-        
-        # Thrombocytopenia
-        if plt and plt < 150:
-            return 'Thrombocytopenia', 0.90
-        
-        # Leukocytosis
-        if wbc and wbc > 10:
-            return 'Leukocytosis', 0.75
-        
-        # Leukopenia
-        if wbc and wbc < 4.5:
-            return 'Leukopenia', 0.80
-        
-        # Polycythemia
-        if rbc and rbc > 5.4:
-            return 'Polycythemia', 0.70
-        
-        # Normal (if most parameters are within normal range)
-        abnormal_count = sum(1 for param, value in parameters.items() 
-                           if self._is_abnormal_parameter(param, value))
-        if abnormal_count <= 1:
-            return 'Normal', 0.70
-        else:
-            return 'Multiple Conditions', 0.60
-    
-    def _is_abnormal_parameter(self, param: str, value: float) -> bool:
-        """Check if parameter is abnormal"""
-        from .blood_config import NORMAL_RANGES
+    def _predict_labels_from_parameters(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict disease labels for all rows based on parameter patterns"""
+        # Parameter matrix aligned with ALL_PARAMETERS (NaN where missing, so comparisons are False)
+        values = df.reindex(columns=ALL_PARAMETERS).to_numpy(dtype=np.float32)
+        hgb, mcv, plt, wbc, rbc = (values[:, ALL_PARAMETERS.index(p)] for p in ('HGB', 'MCV', 'PLT', 'WBC', 'RBC'))
+        
+        # Normal if at most one parameter is outside its normal range
+        abnormal_count = ((values < _MINS) | (values > _MAXS)).sum(axis=1)
         
-        if param in NORMAL_RANGES and param not in ['extracted_text_length', 'parameters_found']:
-            normal_min = NORMAL_RANGES[param]['min']
-            normal_max = NORMAL_RANGES[param]['max']
-            return value < normal_min or value > normal_max
+        # Rule-based labeling for initial training data, first matching rule wins
+        rules = [
+            ((hgb < 12) & (mcv < 80), 'Iron Deficiency Anemia', 0.85),
+            ((hgb < 12) & (mcv > 100), 'Vitamin B12 Deficiency', 0.80),
+            (plt < 150, 'Thrombocytopenia', 0.90),
+            (wbc > 10, 'Leukocytosis', 0.75),
+            (wbc < 4.5, 'Leukopenia', 0.80),
+            (rbc > 5.4, 'Polycythemia', 0.70),
+            (abnormal_count <= 1, 'Normal', 0.70),
+        ]
+        conditions = [mask for mask, _, _ in rules]
         
-        return False
+        labels = np.select(conditions, [label for _, label, _ in rules], default='Multiple Conditions')
+        confidence_scores = np.select(conditions, [conf for _, _, conf in rules], default=0.60)
+        return labels, confidence_scores
     
     def create_labeling_interface_data(self, df: pd.DataFrame, output_file: str):
         """Create data for manual labeling interface"""
-        labeling_data = []
+        exclude = {'image_path', 'filename', 'auto_label', 'confidence', 'needs_review'}
+        param_cols = [c for c in df.columns if c not in exclude]
         
-        for _, row in df.iterrows():
+        labeling_data = []
+        for record in df.to_dict('records'):
             item = {
-                'image_path': row['image_path'],
-                'filename': row['filename'],
-                'extracted_parameters': {k: v for k, v in row.items() 
-                                       if k not in ['image_path', 'filename', 'auto_label', 'confidence', 'needs_review'] 
-                                       and not pd.isna(v)},
-                'auto_label': row.get('auto_label', 'Unknown'),
-                'confidence': row.get('confidence', 0),
-                'needs_review': row.get('needs_review', True),
+                'image_path': record['image_path'],
+                'filename': record['filename'],
+                'extracted_parameters': {k: record[k] for k in param_cols if pd.notna(record[k])},
+                'auto_label': record.get('auto_label', 'Unknown'),
+                'confidence': record.get('confidence', 0),
+                'needs_review': record.get('needs_review', True),
                 'manual_label': '',  # To be filled by human labeler
                 'reviewed': False
             }
             labeling_data.append(item)
         
-        with open(output_file, 'w') as f:
-            json.dump(labeling_data, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(
+                labeling_data,
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
         
         logger.info(f"Labeling interface data saved to {output_file}")
         return labeling_data
\ No newline at end of file
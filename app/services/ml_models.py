@@ -1,25 +1,103 @@
-import pickle
+import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 import os
-from sklearn.ensemble import RandomForestClassifier
+import copy
+from contextlib import nullcontext
+from functools import lru_cache
+from sklearn import config_context
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+from sklearn.inspection import permutation_importance
+from threadpoolctl import threadpool_limits
 import logging
+from app.models.blood_config import NORMAL_RANGES
+
+try:
+    import onnxruntime
+except ImportError:  # Optional; predictions fall back to the sklearn forest
+    onnxruntime = None
+
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:  # Optional; the ONNX export is skipped
+    convert_sklearn = None
 
 logger = logging.getLogger(__name__)
 
+# Severity labels indexed by the int8 codes from _abnormalities_from_matrix
+_SEVERITY_LABELS = ('NORMAL', 'MILD', 'MODERATE', 'HIGH')
+
+@lru_cache(maxsize=1024)
+def _recommendations_for(prediction: str, abnormality_signature: tuple) -> tuple:
+    """Recommendations for a prediction and its (parameter, status) abnormality signature"""
+    recommendations = []
+    
+    # General recommendations based on prediction
+    if prediction == 'ANEMIA':
+        recommendations.extend([
+            "Increase iron-rich foods in diet",
+            "Consider iron supplements after consulting doctor",
+            "Include Vitamin C to improve iron absorption"
+        ])
+    elif prediction == 'DIABETES':
+        recommendations.extend([
+            "Monitor blood sugar regularly",
+            "Follow diabetic diet plan",
+            "Exercise regularly",
+            "Consult endocrinologist"
+        ])
+    elif prediction == 'LIVER_DISEASE':
+        recommendations.extend([
+            "Avoid alcohol completely",
+            "Reduce fatty foods",
+            "Consult gastroenterologist",
+            "Monitor liver enzymes regularly"
+        ])
+    elif prediction == 'KIDNEY_DISEASE':
+        recommendations.extend([
+            "Reduce protein intake",
+            "Monitor blood pressure",
+            "Limit salt consumption",
+            "Consult nephrologist"
+        ])
+    
+    # Specific recommendations based on abnormalities
+    for parameter, status in abnormality_signature:
+        if parameter == 'cholesterol' and status == 'HIGH':
+            recommendations.append("Reduce saturated fats and increase fiber intake")
+        elif parameter == 'glucose' and status == 'HIGH':
+            recommendations.append("Reduce sugar and carbohydrate intake")
+        elif parameter == 'hemoglobin' and status == 'LOW':
+            recommendations.append("Include more green leafy vegetables and legumes")
+    
+    # General health recommendations
+    recommendations.extend([
+        "Maintain regular exercise routine",
+        "Stay hydrated with adequate water intake",
+        "Get 7-8 hours of quality sleep daily",
+        "Manage stress through meditation or yoga"
+    ])
+    
+    return tuple(dict.fromkeys(recommendations))[:6]  # Return top 6 unique recommendations, in order
+
 class BloodAnalysisModel:
     """
     ML Model for comprehensive blood analysis prediction with 26 parameters
     """
     
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, feature_names: Optional[Sequence[str]] = None):
         self.model = None
         self.scaler = StandardScaler()
-        self.feature_names = [
+        self._train_median = None
+        self._classes = None
+        # Chemistry-panel features by default; train_models passes the CBC ALL_PARAMETERS it extracts.
+        # A loaded model file replaces these with the features it was trained on.
+        self.feature_names = list(feature_names) if feature_names else [
             'hemoglobin', 'wbc_count', 'rbc_count', 'platelets', 'glucose',
             'cholesterol', 'hdl_cholesterol', 'ldl_cholesterol', 'triglycerides',
             'alt', 'ast', 'alp', 'bilirubin_total', 'bilirubin_direct', 
@@ -28,6 +106,8 @@ class BloodAnalysisModel:
             'albumin', 'globulin', 'ag_ratio', 'tsh'
         ]
         self.model_path = model_path or 'ml_models/enhanced_blood_model.pkl'
+        self.onnx_path = os.path.splitext(self.model_path)[0] + '.onnx'
+        self._ort_session = None
         self.is_trained = False
         
         # Normal ranges for 26 blood parameters
@@ -59,6 +139,10 @@ class BloodAnalysisModel:
             'ag_ratio': (1.0, 2.0),              # Albumin/Globulin ratio
             'tsh': (0.4, 4.0)                    # mIU/L (Thyroid Stimulating Hormone)
         }
+        # CBC parameters, for models trained on the extracted report features
+        self.normal_ranges.update({p: (r['min'], r['max']) for p, r in NORMAL_RANGES.items()})
+        
+        self._set_feature_names(self.feature_names)
         
         # Possible health conditions to predict
         self.conditions = [
@@ -77,15 +161,28 @@ class BloodAnalysisModel:
         # Load model if exists
         self.load_model()
     
+    def _set_feature_names(self, feature_names: Sequence[str]):
+        """Use feature_names as the model's input columns and rebuild the per-feature range arrays"""
+        self.feature_names = list(feature_names)
+        
+        # Range bounds as arrays in feature order for vectorized abnormality checks
+        self._range_lo = np.array([self.normal_ranges[p][0] for p in self.feature_names], dtype=np.float64)
+        self._range_hi = np.array([self.normal_ranges[p][1] for p in self.feature_names], dtype=np.float64)
+        self._range_labels = [f"{low}-{high}" for low, high in (self.normal_ranges[p] for p in self.feature_names)]
+    
     def load_model(self) -> bool:
         """Load trained model from file"""
         try:
             if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
-                    self.model = model_data['model']
-                    self.scaler = model_data['scaler']
-                    self.is_trained = True
+                # Memory-map the tree arrays so worker processes share one page-cached copy
+                model_data = joblib.load(self.model_path, mmap_mode='r')
+                self.model = model_data['model']
+                self.scaler = model_data['scaler']
+                self._train_median = model_data.get('train_median')
+                self._set_feature_names(model_data.get('feature_names', self.feature_names))
+                self._classes = self.model.classes_.tolist()
+                self.is_trained = True
+                self._load_onnx_session()
                 logger.info(f"Model loaded successfully from {self.model_path}")
                 return True
             else:
@@ -97,32 +194,85 @@ class BloodAnalysisModel:
             self._initialize_new_model()
             return False
     
-    def _initialize_new_model(self):
-        """Initialize a new model"""
-        self.model = RandomForestClassifier(
-            n_estimators=200,
-            max_depth=15,
-            random_state=42,
-            n_jobs=-1,
-            class_weight='balanced'
-        )
+    def _initialize_new_model(self, use_hgbt: bool = False):
+        """Initialize a new model (a histogram gradient-boosting model instead of the forest if use_hgbt)"""
+        if use_hgbt:
+            # Bins each feature to uint8 once, then fits on the bins; much faster than the forest on this data
+            self.model = HistGradientBoostingClassifier(
+                max_iter=200,
+                early_stopping=True,
+                random_state=42,
+                class_weight='balanced'
+            )
+        else:
+            self.model = RandomForestClassifier(
+                n_estimators=200,
+                max_depth=15,
+                random_state=42,
+                n_jobs=-1,
+                class_weight='balanced'
+            )
+        self._ort_session = None
+        self._classes = None
         self.is_trained = False
         logger.info("New model initialized with 26 parameters")
     
-    def save_model(self) -> bool:
-        """Save trained model to file"""
+    def _export_onnx(self):
+        """Export the trained forest to ONNX and serve predictions from it"""
+        if convert_sklearn is None:
+            return
         try:
+            # zipmap disabled so the probability output is a plain (n_samples, n_classes) tensor.
+            # The ONNX tree ensemble stores split thresholds as float32, half the size of
+            # sklearn's float64 node arrays; neither runtime accepts integer thresholds.
+            onnx_model = convert_sklearn(
+                self.model,
+                initial_types=[('input', FloatTensorType([None, len(self.feature_names)]))],
+                options={id(self.model): {'zipmap': False}}
+            )
+            with open(self.onnx_path, 'wb') as f:
+                f.write(onnx_model.SerializeToString())
+            logger.info(f"ONNX model exported to {self.onnx_path}")
+            self._load_onnx_session()
+        except Exception as e:
+            logger.warning(f"ONNX export failed, using sklearn for predictions: {str(e)}")
+    
+    def _load_onnx_session(self):
+        """Open an ONNX Runtime session if an export at least as new as the model exists"""
+        self._ort_session = None
+        if onnxruntime is None or not os.path.exists(self.onnx_path):
+            return
+        if os.path.getmtime(self.onnx_path) < os.path.getmtime(self.model_path):
+            logger.warning(f"ONNX model at {self.onnx_path} is older than {self.model_path}, ignoring it")
+            return
+        try:
+            self._ort_session = onnxruntime.InferenceSession(self.onnx_path, providers=['CPUExecutionProvider'])
+            logger.info(f"ONNX Runtime session loaded from {self.onnx_path}")
+        except Exception as e:
+            logger.warning(f"Could not load ONNX model, using sklearn for predictions: {str(e)}")
+    
+    def save_model(self, path: Optional[str] = None) -> bool:
+        """Save trained model to file (a given path becomes the model's path from then on)"""
+        try:
+            if path:
+                self.model_path = path
+                self.onnx_path = os.path.splitext(path)[0] + '.onnx'
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
             model_data = {
                 'model': self.model,
                 'scaler': self.scaler,
+                'train_median': self._train_median,
                 'feature_names': self.feature_names,
                 'normal_ranges': self.normal_ranges,
                 'conditions': self.conditions
             }
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            # Uncompressed so load_model can memory-map the arrays. Written beside the target and swapped
+            # in, since this model's own arrays may be mapped from the current file (warm-start retraining)
+            tmp_path = self.model_path + '.tmp'
+            joblib.dump(model_data, tmp_path, compress=0, protocol=4)
+            os.replace(tmp_path, self.model_path)
             logger.info(f"Model saved successfully to {self.model_path}")
+            self._export_onnx()
             return True
         except Exception as e:
             logger.error(f"Error saving model: {str(e)}")
@@ -153,13 +303,49 @@ class BloodAnalysisModel:
             logger.error(f"Error in data preprocessing: {str(e)}")
             raise
     
-    def train(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2) -> Dict[str, Any]:
-        """Train the model with provided data"""
+    def train(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2, n_jobs: Optional[int] = None,
+              extra_trees: int = 0, save: bool = True) -> Dict[str, Any]:
+        """Train the model with provided data (n_jobs overrides the forest's tree-level parallelism)"""
         try:
             logger.info("Starting model training...")
             
-            # Preprocess features
-            X_processed = self.preprocess_data(X)
+            # The forest takes n_jobs directly; gradient boosting has none, so its OpenMP threads are capped around fit
+            params = self.model.get_params()
+            if n_jobs is not None and 'n_jobs' in params:
+                self.model.set_params(n_jobs=n_jobs)
+            cap_threads = n_jobs is not None and n_jobs > 0 and 'n_jobs' not in params
+            
+            # Grow an already-trained model by extra_trees, keeping its existing trees as they are
+            if extra_trees and self.is_trained:
+                # load_model maps the arrays read-only; gradient boosting updates its state in place
+                self.model = copy.deepcopy(self.model)
+                size_param = 'n_estimators' if 'n_estimators' in params else 'max_iter'
+                logger.info(f"Adding {extra_trees} trees to the existing {params[size_param]}")
+                self.model.set_params(warm_start=True, **{size_param: params[size_param] + extra_trees})
+            
+            missing = [f for f in self.feature_names if f not in X.columns]
+            if missing:
+                raise ValueError(f"Training data is missing feature columns: {', '.join(missing)}")
+            
+            # One contiguous float32 matrix in feature_names order; float32 is the forest's
+            # native split dtype, so fit works on this buffer without another conversion
+            X_arr = X[self.feature_names].to_numpy(dtype=np.float32)
+            
+            # Per-feature training medians, used to impute missing values here and at prediction time;
+            # a feature never present in the training set is imputed as 0
+            empty = np.isnan(X_arr).all(axis=0)
+            if empty.any():
+                logger.warning(f"No training values for: {', '.join(np.array(self.feature_names)[empty])}")
+                X_arr[:, empty] = 0.0
+            median = np.nanmedian(X_arr, axis=0)
+            self._train_median = median.astype(np.float64)
+            X_arr = np.where(np.isnan(X_arr), median, X_arr)
+            
+            # Scale the features
+            if self.is_trained:
+                X_processed = self.scaler.transform(X_arr)
+            else:
+                X_processed = self.scaler.fit_transform(X_arr)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -167,22 +353,35 @@ class BloodAnalysisModel:
             )
             
             # Train model
-            self.model.fit(X_train, y_train)
+            with threadpool_limits(n_jobs, user_api='openmp') if cap_threads else nullcontext():
+                self.model.fit(X_train, y_train)
+            self.model.set_params(warm_start=False)
+            self._classes = self.model.classes_.tolist()
             self.is_trained = True
             
             # Evaluate model
             y_pred = self.model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
             
-            # Save model
-            self.save_model()
+            # Impurity importances for the forest; gradient boosting has none, so measure each
+            # feature by the score drop when it is shuffled on the held-out split
+            importances = getattr(self.model, 'feature_importances_', None)
+            if importances is None:
+                importances = permutation_importance(
+                    self.model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=n_jobs
+                ).importances_mean
+            
+            # Callers that persist the model themselves pass save=False
+            if save:
+                self.save_model()
             
             results = {
                 'accuracy': accuracy,
                 'classification_report': classification_report(y_test, y_pred, output_dict=True),
                 'features_used': len(self.feature_names),
                 'training_samples': len(X_train),
-                'test_samples': len(X_test)
+                'test_samples': len(X_test),
+                'feature_importances': importances
             }
             
             logger.info(f"Model training completed. Accuracy: {accuracy:.4f}")
@@ -192,150 +391,134 @@ class BloodAnalysisModel:
             logger.error(f"Error in model training: {str(e)}")
             raise
     
-    def predict(self, blood_data: Dict[str, float]) -> Dict[str, Any]:
+    def predict(self, blood_data: Dict[str, float], include_probabilities: bool = False) -> Dict[str, Any]:
         """Predict health condition based on blood test results"""
+        return self.predict_many([blood_data], include_probabilities)[0]
+    
+    def predict_many(self, blood_data_list: List[Dict[str, float]],
+                     include_probabilities: bool = False) -> List[Dict[str, Any]]:
+        """Predict health conditions for a batch of blood test results with one model call"""
         try:
             if not self.is_trained:
-                return {
+                return [{
                     'error': 'Model not trained',
                     'suggestion': 'Train the model first or load a pre-trained model'
-                }
+                } for _ in blood_data_list]
             
-            # Convert input to DataFrame
-            input_df = pd.DataFrame([blood_data])
+            # Stack inputs into one feature matrix in feature_names order
+            X = np.array(
+                [[blood_data.get(f, np.nan) for f in self.feature_names] for blood_data in blood_data_list],
+                dtype=np.float64
+            )
             
-            # Preprocess data
-            processed_data = self.preprocess_data(input_df)
+            # Range checks run once over the whole batch on the raw values
+            batch_abnormalities = self._abnormalities_from_matrix(X)
             
-            # Make prediction
-            prediction = self.model.predict(processed_data)[0]
-            probabilities = self.model.predict_proba(processed_data)[0]
+            # Impute missing features with the training medians, as preprocess_data does
+            # for the training set; models saved without medians fall back to the mean
+            if self._train_median is not None:
+                np.copyto(X, self._train_median, where=np.isnan(X))
             
-            # Get confidence score
-            confidence = max(probabilities)
+            # Standardize with the fitted scaler's statistics (0 for anything still missing)
+            X = np.nan_to_num((X - self.scaler.mean_) / self.scaler.scale_, nan=0.0)
             
-            # Analyze abnormalities
-            abnormalities = self._analyze_abnormalities(blood_data)
+            # Make predictions with the compiled ONNX forest when available; otherwise X is
+            # contiguous float64 and nan_to_num leaves it finite, so sklearn's per-call
+            # finiteness scan can be skipped
+            if self._ort_session is not None:
+                probabilities = self._ort_session.run(None, {'input': X.astype(np.float32)})[1]
+            else:
+                with config_context(assume_finite=True):
+                    probabilities = self.model.predict_proba(X)
+            best = probabilities.argmax(axis=1)
             
-            # Generate recommendations
-            recommendations = self._generate_recommendations(prediction, abnormalities)
+            results = []
+            for abnormalities, probs, idx in zip(batch_abnormalities, probabilities, best):
+                prediction = self._classes[idx]
+                
+                # Generate recommendations
+                recommendations = self._generate_recommendations(prediction, abnormalities)
+                
+                result = {
+                    'prediction': prediction,
+                    'confidence': float(probs[idx]),
+                    'abnormalities': abnormalities,
+                    'recommendations': recommendations,
+                    'parameters_analyzed': len(self.feature_names)
+                }
+                if include_probabilities:
+                    result['probabilities'] = dict(zip(self._classes, probs.tolist()))
+                results.append(result)
             
-            return {
-                'prediction': prediction,
-                'confidence': float(confidence),
-                'probabilities': dict(zip(self.model.classes_, probabilities)),
-                'abnormalities': abnormalities,
-                'recommendations': recommendations,
-                'parameters_analyzed': len(self.feature_names)
-            }
+            return results
             
         except Exception as e:
             logger.error(f"Error in prediction: {str(e)}")
-            return {
+            return [{
                 'error': f'Prediction failed: {str(e)}',
                 'prediction': 'UNKNOWN',
                 'confidence': 0.0
-            }
+            } for _ in blood_data_list]
     
-    def _analyze_abnormalities(self, blood_data: Dict[str, float]) -> List[Dict[str, Any]]:
-        """Analyze which parameters are outside normal ranges"""
-        abnormalities = []
-        
-        for param, value in blood_data.items():
-            if param in self.normal_ranges:
-                low, high = self.normal_ranges[param]
-                if value < low:
-                    abnormalities.append({
-                        'parameter': param,
-                        'value': value,
-                        'normal_range': f"{low}-{high}",
-                        'status': 'LOW',
-                        'severity': self._calculate_severity(value, low, high, 'LOW')
-                    })
-                elif value > high:
-                    abnormalities.append({
-                        'parameter': param,
-                        'value': value,
-                        'normal_range': f"{low}-{high}",
-                        'status': 'HIGH',
-                        'severity': self._calculate_severity(value, low, high, 'HIGH')
-                    })
+    def predict_batch(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict class probabilities for many samples at once, shape (n_samples, n_classes)"""
+        if not self.is_trained:
+            raise ValueError("Model not trained")
         
-        return sorted(abnormalities, key=lambda x: x['severity'], reverse=True)
+        processed_data = self.preprocess_data(data.copy())
+        return self.model.predict_proba(processed_data)
     
-    def _calculate_severity(self, value: float, low: float, high: float, status: str) -> str:
-        """Calculate severity of abnormality"""
-        if status == 'LOW':
-            deviation = (low - value) / low
-        else:
-            deviation = (value - high) / high
+    def _abnormalities_from_matrix(self, vals: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """Analyze out-of-range parameters for every row of an (n_samples, n_features) matrix"""
+        # Missing values are NaN and never compare as low or high
+        low_mask = vals < self._range_lo
+        high_mask = vals > self._range_hi
         
-        if deviation > 0.5:
-            return 'HIGH'
-        elif deviation > 0.2:
-            return 'MODERATE'
-        else:
-            return 'MILD'
-    
-    def _generate_recommendations(self, prediction: str, abnormalities: List[Dict]) -> List[str]:
-        """Generate health recommendations based on prediction and abnormalities"""
-        recommendations = []
+        # Relative deviation past the violated bound; zero lower bounds give inf (severe)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.where(
+                low_mask,
+                (self._range_lo - vals) / self._range_lo,
+                (vals - self._range_hi) / self._range_hi
+            )
         
-        # General recommendations based on prediction
-        if prediction == 'ANEMIA':
-            recommendations.extend([
-                "Increase iron-rich foods in diet",
-                "Consider iron supplements after consulting doctor",
-                "Include Vitamin C to improve iron absorption"
-            ])
-        elif prediction == 'DIABETES':
-            recommendations.extend([
-                "Monitor blood sugar regularly",
-                "Follow diabetic diet plan",
-                "Exercise regularly",
-                "Consult endocrinologist"
-            ])
-        elif prediction == 'LIVER_DISEASE':
-            recommendations.extend([
-                "Avoid alcohol completely",
-                "Reduce fatty foods",
-                "Consult gastroenterologist",
-                "Monitor liver enzymes regularly"
-            ])
-        elif prediction == 'KIDNEY_DISEASE':
-            recommendations.extend([
-                "Reduce protein intake",
-                "Monitor blood pressure",
-                "Limit salt consumption",
-                "Consult nephrologist"
-            ])
+        # Severity codes: 0 normal, 1 mild, 2 moderate, 3 high
+        codes = np.select([deviation > 0.5, deviation > 0.2], [3, 2], default=1).astype(np.int8)
+        codes[~(low_mask | high_mask)] = 0
         
-        # Specific recommendations based on abnormalities
-        for ab in abnormalities:
-            if ab['parameter'] == 'cholesterol' and ab['status'] == 'HIGH':
-                recommendations.append("Reduce saturated fats and increase fiber intake")
-            elif ab['parameter'] == 'glucose' and ab['status'] == 'HIGH':
-                recommendations.append("Reduce sugar and carbohydrate intake")
-            elif ab['parameter'] == 'hemoglobin' and ab['status'] == 'LOW':
-                recommendations.append("Include more green leafy vegetables and legumes")
+        # Decode to dicts only for the flagged cells
+        results = [[] for _ in range(len(vals))]
+        for row, col in zip(*np.nonzero(codes)):
+            results[row].append({
+                'parameter': self.feature_names[col],
+                'value': float(vals[row, col]),
+                'normal_range': self._range_labels[col],
+                'status': 'LOW' if low_mask[row, col] else 'HIGH',
+                'severity': _SEVERITY_LABELS[codes[row, col]]
+            })
         
-        # General health recommendations
-        recommendations.extend([
-            "Maintain regular exercise routine",
-            "Stay hydrated with adequate water intake",
-            "Get 7-8 hours of quality sleep daily",
-            "Manage stress through meditation or yoga"
-        ])
-        
-        return list(set(recommendations))[:6]  # Return top 6 unique recommendations
+        return [sorted(abnormalities, key=lambda x: x['severity'], reverse=True) for abnormalities in results]
+    
+    def _generate_recommendations(self, prediction: str, abnormalities: List[Dict]) -> List[str]:
+        """Generate health recommendations based on prediction and abnormalities"""
+        signature = tuple((ab['parameter'], ab['status']) for ab in abnormalities)
+        return list(_recommendations_for(prediction, signature))
     
     def get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance from the trained model"""
         if not self.is_trained:
             return {}
         
-        importance_dict = dict(zip(self.feature_names, self.model.feature_importances_))
+        # Only the forest has impurity importances; gradient boosting exposes none
+        importances = getattr(self.model, 'feature_importances_', None)
+        if importances is None:
+            return {}
+        
+        importance_dict = dict(zip(self.feature_names, importances))
         return dict(sorted(importance_dict.items(), key=lambda x: x[1], reverse=True))
 
-# Global model instance
-blood_analysis_model = BloodAnalysisModel()
\ No newline at end of file
+# Shared model instance, created on first use so it loads after worker processes fork
+@lru_cache(maxsize=1)
+def get_model() -> BloodAnalysisModel:
+    """Return the process-wide BloodAnalysisModel"""
+    return BloodAnalysisModel()
\ No newline at end of file
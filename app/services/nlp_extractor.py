@@ -1,19 +1,39 @@
 import re
+import bisect
 import logging
 from typing import Dict, Optional, List, Any
-import spacy
 from datetime import datetime
+from app.utils.text_matching import whole_word_hits, leftmost_longest
+
+try:
+    import hyperscan
+except ImportError:  # Optional; falls back to the compiled master regex
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional; falls back to the compiled master regex
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# Numeric values (integer or decimal, commas as thousands separators)
+_NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+# Common OCR artifacts: bullet characters, page numbers, form feeds, URLs and websites
+_ARTIFACTS_RE = re.compile(r'[\uf0b7•·■□●○\f]|Page ?\d+|http[s]?://\S+|www\.\S+')
+
+def _expand_alias(pattern: str) -> List[str]:
+    """Expand an alias pattern into its literal spellings (aliases only use a trailing 's?')"""
+    if pattern.endswith('?'):
+        return [pattern[:-2], pattern[:-1]]
+    return [pattern]
+
 class NLPExtractor:
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy model loaded successfully")
-        except OSError:
-            logger.warning("spaCy model not found, using basic extraction only")
-            self.nlp = None
+        # spaCy pipeline is loaded on first use of self.nlp; extraction itself is pattern based
+        self._nlp = None
+        self._nlp_loaded = False
         
         # Complete parameter patterns for all 26 parameters
         self.parameter_patterns = {
@@ -45,6 +65,45 @@ class NLPExtractor:
             'HFR': [r'HFR', r'High Fluorescence Reticulocytes?']
         }
         
+        # Single master regex over every alias so a report is scanned once. Aliases are
+        # ordered longest first (MCHC before MCH, Platelet Distribution Width before
+        # Platelet) and each gets its own group; the group number maps back to the parameter.
+        aliases = sorted(
+            ((param_name, pattern) for param_name, patterns in self.parameter_patterns.items() for pattern in patterns),
+            key=lambda alias: len(alias[1]),
+            reverse=True
+        )
+        self._alias_params = [param_name for param_name, _ in aliases]
+        self._master_re = re.compile(
+            r'\b(?:' + '|'.join(f'({pattern})' for _, pattern in aliases) + r')\b',
+            re.IGNORECASE
+        )
+        
+        # Hyperscan DFA over the same aliases when available; ids index _alias_params
+        self._hs_db = None
+        if hyperscan is not None:
+            try:
+                self._hs_db = hyperscan.Database()
+                self._hs_db.compile(
+                    expressions=[rf'\b{pattern}\b'.encode() for _, pattern in aliases],
+                    ids=list(range(len(aliases))),
+                    elements=len(aliases),
+                    flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(aliases)
+                )
+                logger.info("Hyperscan parameter database compiled")
+            except Exception as e:
+                logger.warning(f"Hyperscan compile failed, using regex scan: {e}")
+                self._hs_db = None
+        
+        # Otherwise an Aho-Corasick automaton over the lower-cased literal spellings
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for param_name, pattern in aliases:
+                for literal in _expand_alias(pattern):
+                    self._automaton.add_word(literal.lower(), (len(literal), param_name))
+            self._automaton.make_automaton()
+        
         # Unit patterns
         self.unit_patterns = [
             r'×10⁹/L', r'×10\^9/L', r'10\^9/L', r'10\*\*9/L',
@@ -55,15 +114,46 @@ class NLPExtractor:
             r'pg', r'picogram'
         ]
 
+    @property
+    def nlp(self):
+        """spaCy pipeline with tokenizer only, loaded on first access"""
+        if not self._nlp_loaded:
+            self._nlp_loaded = True
+            try:
+                import spacy
+                self._nlp = spacy.load(
+                    "en_core_web_sm",
+                    disable=["tok2vec", "tagger", "parser", "ner", "lemmatizer", "attribute_ruler"]
+                )
+                logger.info("spaCy model loaded successfully")
+            except (ImportError, OSError):
+                logger.warning("spaCy model not found, using basic extraction only")
+                self._nlp = None
+        return self._nlp
+    
     def extract_parameters(self, text: str) -> Dict[str, Optional[float]]:
         """Extract all 26 blood parameters from text using NLP and pattern matching"""
         parameters = {}
         
-        # Split text into lines for processing
-        lines = text.split('\n')
+        # Tokenize numbers once; each parameter then looks up the numbers after its name
+        number_matches = list(_NUMBER_RE.finditer(text))
+        number_starts = [match.start() for match in number_matches]
+        numbers = [float(match.group().replace(',', '')) for match in number_matches]
         
-        for param_name, patterns in self.parameter_patterns.items():
-            param_value = self._extract_parameter_value(lines, patterns)
+        hits = self._scan_parameter_names(text)
+        for i, (_, name_end, param_name) in enumerate(hits):
+            if param_name in parameters:
+                continue
+            
+            # Value sits on the same line or the next one, before the next parameter name
+            line_end = text.find('\n', name_end)
+            if line_end != -1:
+                line_end = text.find('\n', line_end + 1)
+            end = len(text) if line_end == -1 else line_end
+            if i + 1 < len(hits):
+                end = min(end, hits[i + 1][0])
+            
+            param_value = self._first_reasonable_value(numbers, number_starts, name_end, end)
             if param_value is not None:
                 parameters[param_name] = param_value
                 logger.debug(f"Extracted {param_name}: {param_value}")
@@ -71,49 +161,53 @@ class NLPExtractor:
         logger.info(f"Extracted {len(parameters)} parameters from text")
         return parameters
     
-    def _extract_parameter_value(self, lines: List[str], patterns: List[str]) -> Optional[float]:
-        """Extract parameter value using multiple patterns"""
-        for pattern in patterns:
-            for i, line in enumerate(lines):
-                # Case insensitive search
-                if re.search(pattern, line, re.IGNORECASE):
-                    # Look for numerical values in the line and surrounding lines
-                    value = self._extract_numerical_value(line)
-                    if value is not None:
-                        return value
-                    
-                    # Check next line if value not found in same line
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1]
-                        value = self._extract_numerical_value(next_line)
-                        if value is not None:
-                            return value
+    def _scan_parameter_names(self, text: str) -> List[tuple]:
+        """Find parameter names in text as ordered, non-overlapping (start, end, param) hits"""
+        if self._hs_db is not None:
+            return self._scan_hyperscan(text)
         
-        return None
-    
-    def _extract_numerical_value(self, text: str) -> Optional[float]:
-        """Extract numerical value from text, handling various formats"""
-        # Remove commas from numbers
-        text = text.replace(',', '')
-        
-        # Look for patterns like: "Parameter: 12.34 unit" or "12.34 (unit)"
-        patterns = [
-            r'(\d+\.\d+)',  # Decimal numbers
-            r'(\d+)',       # Whole numbers
+        # Lower-casing must keep offsets aligned for the automaton hits to index text
+        lowered = text.lower()
+        if self._automaton is not None and len(lowered) == len(text):
+            return self._scan_automaton(lowered)
+        
+        return [
+            (match.start(), match.end(), self._alias_params[match.lastindex - 1])
+            for match in self._master_re.finditer(text)
         ]
+    
+    def _scan_hyperscan(self, text: str) -> List[tuple]:
+        """Scan text with the Hyperscan database"""
+        data = text.encode('utf-8')
+        raw_hits = []
         
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                # Take the first match that looks like a reasonable blood parameter value
-                for match in matches:
-                    try:
-                        value = float(match)
-                        # Filter out unlikely values (e.g., dates, page numbers)
-                        if self._is_reasonable_blood_value(value):
-                            return value
-                    except ValueError:
-                        continue
+        def on_match(alias_id, start, end, flags, context):
+            raw_hits.append((start, end, self._alias_params[alias_id]))
+        
+        self._hs_db.scan(data, match_event_handler=on_match)
+        hits = leftmost_longest(raw_hits)
+        
+        # Offsets are in bytes; map back to character offsets for non-ASCII text
+        if len(data) != len(text):
+            hits = [
+                (len(data[:start].decode('utf-8', 'ignore')), len(data[:end].decode('utf-8', 'ignore')), param_name)
+                for start, end, param_name in hits
+            ]
+        return hits
+    
+    def _scan_automaton(self, lowered: str) -> List[tuple]:
+        """Scan lower-cased text with the Aho-Corasick automaton, keeping whole-word hits"""
+        return leftmost_longest(whole_word_hits(self._automaton, lowered))
+    
+    def _first_reasonable_value(self, numbers: List[float], number_starts: List[int],
+                                start: int, end: int) -> Optional[float]:
+        """Return the first tokenized number in text[start:end] that looks like a blood value"""
+        for i in range(bisect.bisect_left(number_starts, start), len(numbers)):
+            if number_starts[i] >= end:
+                break
+            # Filter out unlikely values (e.g., dates, page numbers)
+            if self._is_reasonable_blood_value(numbers[i]):
+                return numbers[i]
         
         return None
     
@@ -130,16 +224,7 @@ class NLPExtractor:
         text = re.sub(r'\s+', ' ', text)
         
         # Remove common OCR artifacts
-        artifacts = [
-            r'', r'•', r'·', r'■', r'□', r'●', r'○',  # Bullet characters
-            r'Page \d+', r'Page\d+',  # Page numbers
-            r'\x0c', r'\f',  # Form feed
-            r'http[s]?://\S+',  # URLs
-            r'www\.\S+',  # Websites
-        ]
-        
-        for artifact in artifacts:
-            text = re.sub(artifact, '', text)
+        text = _ARTIFACTS_RE.sub('', text)
         
         return text.strip()
     
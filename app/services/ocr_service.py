@@ -1,14 +1,78 @@
 import pytesseract
 from PIL import Image
-import pdf2image
+import fitz
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import cv2
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# PDF rasterisation settings: grayscale pages at 200 DPI are enough for Tesseract
+_PDF_DPI = 200
+
+# OCR configuration for medical reports: LSTM engine, uniform text block, keep column spacing
+_TESSERACT_CONFIG = r'--oem 1 --psm 6 -c preserve_interword_spaces=1 -c classify_bln_numeric_mode=1'
+
+# PDF pages are OCR'd on one shared thread pool per process. Tesseract runs as a subprocess, so
+# threads overlap it without forking the server; bounded since every uvicorn worker has its own pool
+_PDF_OCR_THREADS = 4
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# One OpenMP thread per Tesseract run; concurrent requests and pages already spread across cores
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# Per-thread grayscale/binary buffers, reused while page size stays the same
+_buffers = threading.local()
+
+def _page_buffers(shape: tuple) -> tuple:
+    """Return reusable (gray, binary) uint8 buffers for the given page shape"""
+    bufs = getattr(_buffers, 'bufs', None)
+    if bufs is None or bufs[0].shape != shape:
+        bufs = (np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=np.uint8))
+        _buffers.bufs = bufs
+    return bufs
+
+def _preprocess_image(image: np.ndarray) -> np.ndarray:
+    """Grayscale and binarise an image for OCR; the result is reused by the next call on this thread"""
+    gray, binary = _page_buffers(image.shape[:2])
+    
+    # Convert to grayscale
+    if len(image.shape) == 3:
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+    else:
+        gray = image
+    
+    # Single-pass local thresholding (replaces median blur + Otsu)
+    cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10, dst=binary)
+    
+    return binary
+
+def _get_pdf_pool() -> ThreadPoolExecutor:
+    """Return this process's page-OCR thread pool, creating it on first use"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ThreadPoolExecutor(
+                    max_workers=min(_PDF_OCR_THREADS, os.cpu_count() or 1),
+                    thread_name_prefix='pdf-ocr'
+                )
+    return _pdf_pool
+
+def _ocr_page(image: np.ndarray) -> str:
+    """Preprocess and OCR a single PDF page; runs on the page-OCR thread pool"""
+    try:
+        processed_image = _preprocess_image(image)
+    except Exception as e:
+        logger.error(f"Image preprocessing error: {e}")
+        processed_image = image
+    return pytesseract.image_to_string(processed_image, lang='eng', config=_TESSERACT_CONFIG)
+
 class OCRService:
     def __init__(self, tesseract_path: Optional[str] = None):
         if tesseract_path and os.path.exists(tesseract_path):
@@ -20,19 +84,7 @@ class OCRService:
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """Preprocess image for better OCR results"""
         try:
-            # Convert to grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
-            
-            # Apply noise removal
-            denoised = cv2.medianBlur(gray, 3)
-            
-            # Apply thresholding
-            _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            return thresh
+            return _preprocess_image(image)
         except Exception as e:
             logger.error(f"Image preprocessing error: {e}")
             return image
@@ -40,8 +92,8 @@ class OCRService:
     def extract_text_from_image(self, image_path: str) -> str:
         """Extract text from image file"""
         try:
-            # Read image
-            image = cv2.imread(image_path)
+            # Decode straight to a single grayscale channel; no BGR buffer or colour conversion
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             if image is None:
                 raise ValueError(f"Could not read image file: {image_path}")
             
@@ -50,11 +102,8 @@ class OCRService:
             # Preprocess image
             processed_image = self.preprocess_image(image)
             
-            # OCR configuration for medical reports
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,:;()-/ '
-            
             # Extract text
-            text = pytesseract.image_to_string(processed_image, config=custom_config)
+            text = pytesseract.image_to_string(processed_image, config=_TESSERACT_CONFIG)
             
             logger.info(f"Successfully extracted text from image: {image_path}")
             return text.strip()
@@ -66,21 +115,20 @@ class OCRService:
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            # Convert PDF to images
-            images = pdf2image.convert_from_path(pdf_path)
+            # Render PDF pages in-process straight to grayscale pixel buffers
+            pages = []
+            with fitz.open(pdf_path) as doc:
+                for page in doc:
+                    pix = page.get_pixmap(dpi=_PDF_DPI, colorspace=fitz.csGRAY)
+                    pages.append(np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width))
             
-            all_text = []
-            for i, image in enumerate(images):
-                # Convert PIL image to OpenCV format
-                open_cv_image = np.array(image)
-                open_cv_image = open_cv_image[:, :, ::-1].copy()  # Convert RGB to BGR
-                
-                # Preprocess and extract text
-                processed_image = self.preprocess_image(open_cv_image)
-                text = pytesseract.image_to_string(processed_image)
-                all_text.append(text)
-                
-                logger.info(f"Processed page {i+1} of PDF")
+            # OCR pages concurrently on the shared pool; map preserves page order
+            if len(pages) > 1:
+                all_text = list(_get_pdf_pool().map(_ocr_page, pages))
+            else:
+                all_text = [_ocr_page(page) for page in pages]
+            
+            logger.info(f"Processed {len(pages)} pages of PDF")
             
             combined_text = "\n".join(all_text)
             logger.info(f"Successfully extracted text from PDF: {pdf_path}")
@@ -1,6 +1,11 @@
 import logging
+import operator
+from functools import lru_cache
 from typing import List, Dict, Any
 from enum import Enum
+from types import MappingProxyType
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -19,128 +24,136 @@ class RecommendationTemplate:
         self.base_duration = duration
         self.tips = tips
 
+# Disease-specific recommendation templates, shared read-only by every engine instance.
+# Each template is (category, recommendation_text, why, purpose, base_duration_weeks, tips)
+_DISEASE_RECOMMENDATIONS = MappingProxyType({
+    'Iron Deficiency Anemia': (
+        (
+            'Diet',
+            'Increase iron-rich foods: red meat, spinach, lentils, fortified cereals',
+            'Low hemoglobin levels indicate iron deficiency',
+            'Boost iron levels and improve oxygen transport',
+            12,
+            ('Combine with Vitamin C for better absorption', 'Avoid tea/coffee with meals')
+        ),
+        (
+            'Medical',
+            'Consult doctor for iron supplements',
+            'Diet alone may not be sufficient',
+            'Rapidly increase iron stores',
+            8,
+            ('Take supplements as prescribed', 'Monitor for side effects')
+        ),
+    ),
+    'Vitamin B12 Deficiency': (
+        (
+            'Diet',
+            'Consume B12-rich foods: eggs, fish, dairy, fortified foods',
+            'Low B12 affects nerve function and red blood cell production',
+            'Restore B12 levels and prevent nerve damage',
+            16,
+            ('Include animal products in diet', 'Consider fortified foods if vegetarian')
+        ),
+    ),
+    'Thrombocytopenia': (
+        (
+            'Lifestyle',
+            'Avoid activities that may cause bleeding or bruising',
+            'Low platelet count increases bleeding risk',
+            'Prevent bleeding complications',
+            12,
+            ('Use soft-bristle toothbrush', 'Avoid contact sports')
+        ),
+    ),
+    'Leukocytosis': (
+        (
+            'Medical',
+            'Consult doctor immediately for infection screening',
+            'High white blood cells may indicate infection',
+            'Identify and treat underlying cause',
+            2,
+            ('Monitor for fever', 'Get prescribed tests done')
+        ),
+    ),
+    'Normal': (
+        (
+            'Lifestyle',
+            'Maintain balanced diet and regular exercise',
+            'Your blood parameters are within normal range',
+            'Maintain good health',
+            52,
+            ('Eat variety of fruits and vegetables', 'Exercise 30 minutes daily')
+        ),
+    )
+})
+
+# Sort order for priority levels; unknown levels sort last
+_PRIORITY_SCORES = {'High': 0, 'Medium': 1, 'Low': 2}
+
+# Duration scaling per probability bin: > 0.8, > 0.5, otherwise
+_DURATION_FACTORS = (1.0, 0.75, 0.5)
+
+def _probability_bin(probability: float) -> int:
+    """Bin a disease probability: 0 for > 0.8, 1 for > 0.5, otherwise 2"""
+    return 0 if probability > 0.8 else 1 if probability > 0.5 else 2
+
+def _derive_priority(base_duration: int, category: str, bin_idx: int) -> tuple:
+    """Return (duration_weeks, priority_level, priority_score) for a template and probability bin"""
+    level = (
+        'High' if category == 'Medical' or bin_idx == 0
+        else 'Medium' if category == 'Diet' or bin_idx == 1
+        else 'Low'
+    )
+    return int(base_duration * _DURATION_FACTORS[bin_idx]), level, _PRIORITY_SCORES[level]
+
+@lru_cache(maxsize=512)
+def _build_recommendations(key: tuple) -> bytes:
+    """Build the serialized top-8 recommendations for a tuple of (disease_name, probability_bin)"""
+    recommendations = []
+    
+    # Add disease-specific recommendations
+    for disease_name, bin_idx in key:
+        for category, text, why, purpose, base_duration, _ in _DISEASE_RECOMMENDATIONS.get(disease_name, ()):
+            duration, priority_level, priority_score = _derive_priority(base_duration, category, bin_idx)
+            recommendations.append({
+                'category': category,
+                'recommendation_text': text,
+                'why': why,
+                'purpose': purpose,
+                'duration_weeks': duration,
+                'priority_level': priority_level,
+                'priority_score': priority_score,
+                'disease_related': disease_name
+            })
+    
+    # If no specific recommendations, add general health tips
+    if not recommendations:
+        for category, text, why, purpose, base_duration, _ in _DISEASE_RECOMMENDATIONS['Normal']:
+            recommendations.append({
+                'category': category,
+                'recommendation_text': text,
+                'why': why,
+                'purpose': purpose,
+                'duration_weeks': base_duration,
+                'priority_level': 'Low',
+                'priority_score': _PRIORITY_SCORES['Low'],
+                'disease_related': 'General Health'
+            })
+    
+    # Sort by priority in place (stable) and keep the top 8
+    recommendations.sort(key=operator.itemgetter('priority_score'))
+    return orjson.dumps(recommendations[:8])
+
 class RecommendationEngine:
     def __init__(self):
-        self.disease_recommendations = self._initialize_recommendations()
-    
-    def _initialize_recommendations(self) -> Dict[str, List[Dict]]:
-        """Initialize all disease-specific recommendations"""
-        return {
-            'Iron Deficiency Anemia': [
-                {
-                    'category': 'Diet',
-                    'recommendation_text': 'Increase iron-rich foods: red meat, spinach, lentils, fortified cereals',
-                    'why': 'Low hemoglobin levels indicate iron deficiency',
-                    'purpose': 'Boost iron levels and improve oxygen transport',
-                    'base_duration': 12,
-                    'tips': ['Combine with Vitamin C for better absorption', 'Avoid tea/coffee with meals']
-                },
-                {
-                    'category': 'Medical',
-                    'recommendation_text': 'Consult doctor for iron supplements',
-                    'why': 'Diet alone may not be sufficient',
-                    'purpose': 'Rapidly increase iron stores',
-                    'base_duration': 8,
-                    'tips': ['Take supplements as prescribed', 'Monitor for side effects']
-                }
-            ],
-            'Vitamin B12 Deficiency': [
-                {
-                    'category': 'Diet',
-                    'recommendation_text': 'Consume B12-rich foods: eggs, fish, dairy, fortified foods',
-                    'why': 'Low B12 affects nerve function and red blood cell production',
-                    'purpose': 'Restore B12 levels and prevent nerve damage',
-                    'base_duration': 16,
-                    'tips': ['Include animal products in diet', 'Consider fortified foods if vegetarian']
-                }
-            ],
-            'Thrombocytopenia': [
-                {
-                    'category': 'Lifestyle',
-                    'recommendation_text': 'Avoid activities that may cause bleeding or bruising',
-                    'why': 'Low platelet count increases bleeding risk',
-                    'purpose': 'Prevent bleeding complications',
-                    'base_duration': 12,
-                    'tips': ['Use soft-bristle toothbrush', 'Avoid contact sports']
-                }
-            ],
-            'Leukocytosis': [
-                {
-                    'category': 'Medical',
-                    'recommendation_text': 'Consult doctor immediately for infection screening',
-                    'why': 'High white blood cells may indicate infection',
-                    'purpose': 'Identify and treat underlying cause',
-                    'base_duration': 2,
-                    'tips': ['Monitor for fever', 'Get prescribed tests done']
-                }
-            ],
-            'Normal': [
-                {
-                    'category': 'Lifestyle',
-                    'recommendation_text': 'Maintain balanced diet and regular exercise',
-                    'why': 'Your blood parameters are within normal range',
-                    'purpose': 'Maintain good health',
-                    'base_duration': 52,
-                    'tips': ['Eat variety of fruits and vegetables', 'Exercise 30 minutes daily']
-                }
-            ]
-        }
+        self.disease_recommendations = _DISEASE_RECOMMENDATIONS
     
     def generate_recommendations(self, disease_predictions: List[Dict], parameters: Dict[str, float]) -> List[Dict[str, Any]]:
         """Generate personalized recommendations based on disease predictions"""
-        recommendations = []
-        
-        # Add disease-specific recommendations
-        for disease in disease_predictions:
-            disease_name = disease['disease_name']
-            if disease_name in self.disease_recommendations:
-                for template in self.disease_recommendations[disease_name]:
-                    recommendation = {
-                        'category': template['category'],
-                        'recommendation_text': template['recommendation_text'],
-                        'why': template['why'],
-                        'purpose': template['purpose'],
-                        'duration_weeks': self._calculate_duration(template['base_duration'], disease['probability']),
-                        'priority_level': self._get_priority_level(template['category'], disease['probability']),
-                        'disease_related': disease_name
-                    }
-                    recommendations.append(recommendation)
-        
-        # If no specific recommendations, add general health tips
-        if not recommendations:
-            for template in self.disease_recommendations['Normal']:
-                recommendations.append({
-                    'category': template['category'],
-                    'recommendation_text': template['recommendation_text'],
-                    'why': template['why'],
-                    'purpose': template['purpose'],
-                    'duration_weeks': template['base_duration'],
-                    'priority_level': 'Low',
-                    'disease_related': 'General Health'
-                })
-        
-        # Sort by priority and return top 8
-        return sorted(recommendations, key=lambda x: self._priority_score(x['priority_level']))[:8]
-    
-    def _calculate_duration(self, base_duration: int, probability: float) -> int:
-        """Calculate duration based on disease probability"""
-        if probability > 0.8:
-            return base_duration
-        elif probability > 0.5:
-            return int(base_duration * 0.75)
-        else:
-            return int(base_duration * 0.5)
-    
-    def _get_priority_level(self, category: str, probability: float) -> str:
-        """Get priority level based on category and probability"""
-        if category == 'Medical' or probability > 0.8:
-            return 'High'
-        elif category == 'Diet' or probability > 0.5:
-            return 'Medium'
-        else:
-            return 'Low'
-    
-    def _priority_score(self, priority: str) -> int:
-        """Convert priority to numerical score for sorting"""
-        priority_scores = {'High': 0, 'Medium': 1, 'Low': 2}
-        return priority_scores.get(priority, 3)
\ No newline at end of file
+        # Output depends only on disease names and probability bins, so cache the serialized result;
+        # loading it back gives callers fresh dicts they are free to modify (e.g. translation)
+        key = tuple(
+            (disease['disease_name'], _probability_bin(disease['probability']))
+            for disease in disease_predictions
+        )
+        return orjson.loads(_build_recommendations(key))
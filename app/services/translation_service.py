@@ -1,9 +1,20 @@
 import logging
-from typing import Dict
+import re
+from functools import lru_cache
+from typing import Dict, List
 import os
+from app.utils.text_matching import whole_word_hits, leftmost_longest
+
+try:
+    import ahocorasick
+except ImportError:  # Optional; falls back to the compiled per-language regex
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# Texts longer than this bypass the translation cache so large one-off strings don't pin memory
+_MAX_CACHED_TEXT_LEN = 512
+
 class TranslationService:
     def __init__(self):
         self.supported_languages = {
@@ -12,6 +23,30 @@ class TranslationService:
             'te': 'Telugu'
         }
         self.medical_translations = self._initialize_medical_translations()
+        # One case-insensitive, whole-word alternation per language (longest terms first)
+        # plus a lower-cased lookup for the matched term
+        self._patterns = {
+            lang: re.compile(
+                r'\b(?:' + '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r')\b',
+                re.IGNORECASE
+            )
+            for lang, terms in self.medical_translations.items()
+        }
+        self._lookup = {
+            lang: {term.lower(): translated for term, translated in terms.items()}
+            for lang, terms in self.medical_translations.items()
+        }
+        # One Aho-Corasick automaton per language matches every term in a single pass
+        self._automata = {}
+        if ahocorasick is not None:
+            for lang, terms in self.medical_translations.items():
+                automaton = ahocorasick.Automaton()
+                for term, translated in terms.items():
+                    automaton.add_word(term.lower(), (len(term), translated))
+                automaton.make_automaton()
+                self._automata[lang] = automaton
+        # Disease names and recommendation texts repeat across requests
+        self._translate_cached = lru_cache(maxsize=8192)(self._translate_terms)
 
     def _initialize_medical_translations(self) -> Dict[str, Dict[str, str]]:
         """Initialize medical term translations"""
@@ -52,17 +87,63 @@ class TranslationService:
             if target_lang == 'en' or target_lang not in self.supported_languages:
                 return text
 
-            # Replace medical terms using translation dictionary
-            translation_dict = self.medical_translations.get(target_lang, {})
-            for eng_term, translated_term in translation_dict.items():
-                if eng_term.lower() in text.lower():
-                    text = text.replace(eng_term, translated_term)
+            text = self._translate(text, target_lang)
 
-            logger.info(f"Translated text to {target_lang}")
+            logger.info("Translated text to %s", target_lang)
             return text
         except Exception as e:
-            logger.error(f"Translation error: {e}")
+            logger.error("Translation error: %s", e)
+            return text
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: str = 'en') -> List[str]:
+        """Translate a list of texts in a single call"""
+        try:
+            if target_lang == 'en' or target_lang not in self.supported_languages:
+                return list(texts)
+
+            translated = [self._translate(text, target_lang) for text in texts]
+
+            logger.info("Translated %s texts to %s", len(texts), target_lang)
+            return translated
+        except Exception as e:
+            logger.error("Batch translation error: %s", e)
+            return list(texts)
+
+    def _translate(self, text: str, target_lang: str) -> str:
+        """Translate via the LRU cache, skipping it for very long texts"""
+        if len(text) > _MAX_CACHED_TEXT_LEN:
+            return self._translate_terms(text, target_lang)
+        return self._translate_cached(text, target_lang)
+
+    def _translate_terms(self, text: str, target_lang: str) -> str:
+        """Replace medical terms using translation dictionary"""
+        automaton = self._automata.get(target_lang)
+        if automaton is not None:
+            lowered = text.lower()
+            # Lower-casing can change length for some scripts; offsets would no longer line up
+            if len(lowered) == len(text):
+                return self._translate_automaton(text, lowered, automaton)
+        
+        pattern = self._patterns.get(target_lang)
+        if pattern is None:
+            return text
+        lookup = self._lookup[target_lang]
+        return pattern.sub(lambda m: lookup[m.group(0).lower()], text)
+
+    def _translate_automaton(self, text: str, lowered: str, automaton) -> str:
+        """Stitch translations of whole-word, leftmost-longest automaton hits into text"""
+        hits = leftmost_longest(whole_word_hits(automaton, lowered))
+        if not hits:
             return text
+        
+        parts = []
+        last_end = 0
+        for start, end, translated in hits:
+            parts.append(text[last_end:start])
+            parts.append(translated)
+            last_end = end
+        parts.append(text[last_end:])
+        return ''.join(parts)
 
 
 class TextToSpeechService:
@@ -79,9 +160,9 @@ class TextToSpeechService:
 
             # For now, just create a placeholder file or return empty
             # You can implement actual TTS later
-            logger.info(f"TTS requested for: {text} in {language}")
+            logger.info("TTS requested for: %s in %s", text, language)
             return ""  # Return empty string to avoid errors
             
         except Exception as e:
-            logger.error(f"TTS generation error: {e}")
+            logger.error("TTS generation error: %s", e)
             return ""
\ No newline at end of file
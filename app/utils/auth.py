@@ -1,22 +1,65 @@
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+import bcrypt
+import jwt
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from config import config
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# HMAC key bytes encoded once rather than on every sign/verify
+_SECRET_KEY = config.SECRET_KEY.encode()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+# Password hashing context: new hashes use argon2id; bcrypt_sha256 and bcrypt hashes stay
+# verifiable and are flagged for rehash on the next successful login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt_sha256", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=config.ARGON2_TIME_COST,
+    argon2__memory_cost=config.ARGON2_MEMORY_COST,
+    argon2__parallelism=config.ARGON2_PARALLELISM
+)
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    """Plain bcrypt hashes ($2a$/$2b$/$2y$) can skip passlib's scheme identification"""
+    return hashed_password.startswith('$2')
+
+def _bcrypt_verify(plain_password: str, hashed_password: str) -> bool:
+    """Check a plain bcrypt hash directly with the bcrypt C routine"""
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def verify_password(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """Verify a password against its hash (constant-time; None runs a dummy verify)"""
     try:
+        if hashed_password is None:
+            # Spend the same time as a real check so unknown usernames aren't revealed by timing
+            pwd_context.dummy_verify()
+            return False
+        if _is_bcrypt_hash(hashed_password):
+            return _bcrypt_verify(plain_password, hashed_password)
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        logger.error(f"Password verification error: {e}")
+        logger.error("Password verification error: %s", e)
         return False
 
+def verify_and_update_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return (valid, new hash) where new hash is set if the stored one is outdated"""
+    try:
+        if hashed_password is None:
+            pwd_context.dummy_verify()
+            return False, None
+        if _is_bcrypt_hash(hashed_password):
+            # bcrypt is deprecated in pwd_context, so a valid password always gets a new hash
+            if _bcrypt_verify(plain_password, hashed_password):
+                return True, pwd_context.hash(plain_password)
+            return False, None
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        logger.error("Password verification error: %s", e)
+        return False, None
+
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
@@ -31,17 +74,17 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
             expire = datetime.utcnow() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=config.ALGORITHM)
         return encoded_jwt
     except Exception as e:
-        logger.error(f"Token creation error: {e}")
+        logger.error("Token creation error: %s", e)
         raise
 
 def verify_token(token: str) -> dict:
     """Verify and decode JWT token"""
     try:
-        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
+        payload = jwt.decode(token, _SECRET_KEY, algorithms=[config.ALGORITHM])
         return payload
-    except JWTError as e:
-        logger.error(f"Token verification error: {e}")
+    except jwt.PyJWTError as e:
+        logger.error("Token verification error: %s", e)
         return None
\ No newline at end of file
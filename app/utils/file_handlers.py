@@ -1,35 +1,69 @@
+import itertools
 import os
-import shutil
-import uuid
-from typing import Optional
-from fastapi import UploadFile
+import secrets
+from typing import Optional, Tuple
+import aiofiles
+from fastapi import HTTPException, UploadFile
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Read size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# File category by lower-case extension
+_TYPE_MAP = {
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'bmp': 'image', 'tiff': 'image',
+    'pdf': 'pdf',
+    'txt': 'text'
+}
+
+# Successful saves are logged at DEBUG; INFO only gets a running count every this many saves
+_SAVE_LOG_INTERVAL = 1000
+
+# Categories accepted for analysis uploads
+_SUPPORTED_TYPES = frozenset({'image', 'pdf'})
+
+def _extension(filename: str) -> str:
+    """Lower-case extension without the dot, or '' if there is none"""
+    _, dot, ext = filename.rpartition('.')
+    return ext.lower() if dot else ''
+
 class FileHandler:
     def __init__(self, upload_folder: str):
         self.upload_folder = upload_folder
+        self._upload_prefix = os.path.join(upload_folder, '')
+        self._saved_count = itertools.count(1)
         os.makedirs(upload_folder, exist_ok=True)
-        logger.info(f"File handler initialized with upload folder: {upload_folder}")
+        logger.info("File handler initialized with upload folder: %s", upload_folder)
     
-    async def save_upload_file(self, file: UploadFile) -> str:
-        """Save uploaded file and return file path"""
+    async def save_upload_file(self, file: UploadFile, max_size: Optional[int] = None) -> Tuple[str, int]:
+        """Stream uploaded file to disk and return (file path, size in bytes)"""
+        # Generate unique filename: 128 random bits as hex, keeping the original extension
+        file_path = self._upload_prefix + secrets.token_hex(16) + os.path.splitext(file.filename)[1]
+        
         try:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            file_path = os.path.join(self.upload_folder, unique_filename)
-            
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # Save file, enforcing the size limit as chunks arrive
+            bytes_written = 0
+            async with aiofiles.open(file_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    bytes_written += len(chunk)
+                    if max_size is not None and bytes_written > max_size:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    await buffer.write(chunk)
             
-            logger.info(f"File saved successfully: {file_path}")
-            return file_path
+            logger.debug("File saved successfully: %s", file_path)
+            saved = next(self._saved_count)
+            if saved % _SAVE_LOG_INTERVAL == 0:
+                logger.info("%d files saved", saved)
+            return file_path, bytes_written
             
+        except HTTPException:
+            self.cleanup_file(file_path)
+            raise
         except Exception as e:
-            logger.error(f"Error saving file: {e}")
+            logger.error("Error saving file: %s", e)
+            self.cleanup_file(file_path)
             raise
     
     def cleanup_file(self, file_path: str):
@@ -37,23 +71,14 @@ class FileHandler:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                logger.info(f"File cleaned up: {file_path}")
+                logger.info("File cleaned up: %s", file_path)
         except Exception as e:
-            logger.error(f"Error cleaning up file: {e}")
+            logger.error("Error cleaning up file: %s", e)
     
     def get_file_type(self, filename: str) -> str:
         """Get file type from filename"""
-        extension = os.path.splitext(filename)[1].lower().lstrip('.')
-        if extension in ['jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-            return 'image'
-        elif extension == 'pdf':
-            return 'pdf'
-        elif extension == 'txt':
-            return 'text'
-        else:
-            return 'unknown'
+        return _TYPE_MAP.get(_extension(filename), 'unknown')
     
     def validate_file_type(self, filename: str) -> bool:
         """Validate if file type is supported"""
-        file_type = self.get_file_type(filename)
-        return file_type in ['image', 'pdf']
\ No newline at end of file
+        return _TYPE_MAP.get(_extension(filename)) in _SUPPORTED_TYPES
\ No newline at end of file
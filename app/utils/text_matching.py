@@ -0,0 +1,32 @@
+from typing import Any, List, Tuple
+
+# Shared post-processing for the Aho-Corasick automata in NLPExtractor and TranslationService.
+# Both store (term length, value) per lower-cased term and want the same hits a whole-word,
+# leftmost-longest regex alternation would give.
+
+def is_word_char(char: str) -> bool:
+    """Match re's notion of a word character for \\b checks"""
+    return char.isalnum() or char == '_'
+
+def whole_word_hits(automaton, lowered: str) -> List[Tuple[int, int, Any]]:
+    """(start, end, value) for every automaton hit in lowered not touching another word character"""
+    hits = []
+    for last, (length, value) in automaton.iter(lowered):
+        start, end = last - length + 1, last + 1
+        if start > 0 and is_word_char(lowered[start - 1]):
+            continue
+        if end < len(lowered) and is_word_char(lowered[end]):
+            continue
+        hits.append((start, end, value))
+    return hits
+
+def leftmost_longest(raw_hits: List[Tuple[int, int, Any]]) -> List[Tuple[int, int, Any]]:
+    """Drop overlapping (start, end, value) hits, keeping the leftmost-longest like the regex"""
+    hits = []
+    last_end = 0
+    for start, end, value in sorted(raw_hits, key=lambda hit: (hit[0], -hit[1])):
+        if start < last_end:
+            continue
+        last_end = end
+        hits.append((start, end, value))
+    return hits
\ No newline at end of file
@@ -1,45 +1,68 @@
 import os
+from dataclasses import dataclass, field
 from typing import Dict, Any
 
+def _env(name: str, default: Any):
+    """Read a setting from the environment when the config is instantiated, parsed as the default's type"""
+    def read():
+        raw = os.environ.get(name)
+        if raw is None:
+            return default
+        if isinstance(default, bool):
+            return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+        return type(default)(raw)
+    return field(default_factory=read)
+
+@dataclass(frozen=True, slots=True)
 class Config:
     # Database Configuration - Oracle
-    DB_USERNAME = 'system'
-    DB_PASSWORD = 'system'
-    DB_HOST = 'localhost'
-    DB_PORT = '1521'
-    DB_SERVICE = 'XE'
+    DB_USERNAME: str = _env('DB_USERNAME', 'system')
+    DB_PASSWORD: str = _env('DB_PASSWORD', 'system')
+    DB_HOST: str = _env('DB_HOST', 'localhost')
+    DB_PORT: str = _env('DB_PORT', '1521')
+    DB_SERVICE: str = _env('DB_SERVICE', 'XE')
+    DB_POOL_MIN: int = _env('DB_POOL_MIN', 2)
+    DB_POOL_SIZE: int = _env('DB_POOL_SIZE', 20)
+    DB_MAX_OVERFLOW: int = _env('DB_MAX_OVERFLOW', 10)
     
-    # ✅ Use python-oracledb connection string
-    @property
-    def DATABASE_URL(self):
-        return f"oracle+oracledb://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_SERVICE}"
+    # ✅ Use python-oracledb connection string (formatted once in __post_init__)
+    DATABASE_URL: str = field(init=False)
     
     # JWT Configuration
-    SECRET_KEY = 'blood-analysis-secret-key-2024-change-in-production-very-secure'
-    ALGORITHM = 'HS256'
-    ACCESS_TOKEN_EXPIRE_MINUTES = 1440
+    SECRET_KEY: str = _env('SECRET_KEY', 'blood-analysis-secret-key-2024-change-in-production-very-secure')
+    ALGORITHM: str = _env('ALGORITHM', 'HS256')
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = _env('ACCESS_TOKEN_EXPIRE_MINUTES', 1440)
+    ARGON2_TIME_COST: int = _env('ARGON2_TIME_COST', 2)
+    ARGON2_MEMORY_COST: int = _env('ARGON2_MEMORY_COST', 65536)  # KiB
+    ARGON2_PARALLELISM: int = _env('ARGON2_PARALLELISM', 2)
     
     # OCR Configuration
-    TESSERACT_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    TESSERACT_PATH: str = _env('TESSERACT_PATH', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
     
     # File Upload Configuration
-    UPLOAD_FOLDER = 'uploads'
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+    UPLOAD_FOLDER: str = _env('UPLOAD_FOLDER', 'uploads')
+    MAX_CONTENT_LENGTH: int = _env('MAX_CONTENT_LENGTH', 16 * 1024 * 1024)
     
     # ML Models Configuration
-    MODEL_PATH = 'ml_models/'
-    MODEL_FILE = 'enhanced_blood_model.pkl'
+    MODEL_PATH: str = _env('MODEL_PATH', 'ml_models/')
+    MODEL_FILE: str = _env('MODEL_FILE', 'enhanced_blood_model.pkl')
     
     # Dataset path
-    DATASET_PATH = r'C:\Users\ardha\Downloads\combine'
+    DATASET_PATH: str = _env('DATASET_PATH', r'C:\Users\ardha\Downloads\combine')
     
     # Supported languages
-    SUPPORTED_LANGUAGES = ['en', 'es', 'fr', 'de', 'hi', 'zh', 'te', 'ta']
+    SUPPORTED_LANGUAGES: tuple = ('en', 'es', 'fr', 'de', 'hi', 'zh', 'te', 'ta')
     
     # API Configuration
-    API_HOST = "0.0.0.0"
-    API_PORT = 8000
-    DEBUG = True
+    API_HOST: str = _env('API_HOST', "0.0.0.0")
+    API_PORT: int = _env('API_PORT', 8000)
+    DEBUG: bool = _env('DEBUG', True)
+    
+    def __post_init__(self):
+        object.__setattr__(
+            self, 'DATABASE_URL',
+            f"oracle+oracledb://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_SERVICE}"
+        )
 
 # Global config instance
 config = Config()
\ No newline at end of file
@@ -6,61 +6,98 @@ import os
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.services.ml_models import blood_analysis_model
+from app.services.ml_models import get_model
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None  # Optional; labels fall back to np.select
+
+# Sample distribution (mean, std) for each of the 26 parameters
+SAMPLE_DISTRIBUTIONS = {
+    'hemoglobin': (14.5, 1.5),
+    'wbc_count': (7500, 2000),
+    'rbc_count': (4.8, 0.5),
+    'platelets': (250000, 50000),
+    'glucose': (95, 20),
+    'cholesterol': (180, 30),
+    'hdl_cholesterol': (50, 10),
+    'ldl_cholesterol': (110, 25),
+    'triglycerides': (150, 40),
+    'alt': (25, 10),
+    'ast': (22, 8),
+    'alp': (100, 30),
+    'bilirubin_total': (0.8, 0.3),
+    'bilirubin_direct': (0.2, 0.1),
+    'bilirubin_indirect': (0.6, 0.2),
+    'creatinine': (0.9, 0.2),
+    'bun': (15, 5),
+    'sodium_level': (140, 3),
+    'potassium_level': (4.0, 0.5),
+    'chloride_level': (102, 3),
+    'calcium_level': (9.5, 0.5),
+    'protein_total': (7.0, 0.5),
+    'albumin': (4.0, 0.4),
+    'globulin': (3.0, 0.4),
+    'ag_ratio': (1.3, 0.2),
+    'tsh': (2.5, 1.0),
+}
+
+# Column layout and float32 distribution parameters for one contiguous sample block
+SAMPLE_COLUMNS = list(SAMPLE_DISTRIBUTIONS)
+SAMPLE_MEANS, SAMPLE_STDS = np.array(list(SAMPLE_DISTRIBUTIONS.values()), dtype=np.float32).T
+HGB, GLU, ALT, AST, CREAT, TSH = (
+    SAMPLE_COLUMNS.index(name) for name in ('hemoglobin', 'glucose', 'alt', 'ast', 'creatinine', 'tsh')
+)
+SAMPLE_LABELS = np.array(['ANEMIA', 'DIABETES', 'LIVER_DISEASE', 'KIDNEY_DISEASE', 'THYROID_DISORDER', 'NORMAL'])
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _label_rows(hgb, glu, alt, ast, creat, tsh, out):
+        """Write one SAMPLE_LABELS index per row; first matching rule wins"""
+        for i in prange(hgb.shape[0]):
+            if hgb[i] < 12:
+                out[i] = 0
+            elif glu[i] > 140:
+                out[i] = 1
+            elif alt[i] > 56 or ast[i] > 40:
+                out[i] = 2
+            elif creat[i] > 1.3:
+                out[i] = 3
+            elif tsh[i] > 4.0:
+                out[i] = 4
+            else:
+                out[i] = 5
 
 def create_sample_data():
     """Create sample training data"""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     n_samples = 1000
     
-    data = {
-        'hemoglobin': np.random.normal(14.5, 1.5, n_samples),
-        'wbc_count': np.random.normal(7500, 2000, n_samples),
-        'rbc_count': np.random.normal(4.8, 0.5, n_samples),
-        'platelets': np.random.normal(250000, 50000, n_samples),
-        'glucose': np.random.normal(95, 20, n_samples),
-        'cholesterol': np.random.normal(180, 30, n_samples),
-        'hdl_cholesterol': np.random.normal(50, 10, n_samples),
-        'ldl_cholesterol': np.random.normal(110, 25, n_samples),
-        'triglycerides': np.random.normal(150, 40, n_samples),
-        'alt': np.random.normal(25, 10, n_samples),
-        'ast': np.random.normal(22, 8, n_samples),
-        'alp': np.random.normal(100, 30, n_samples),
-        'bilirubin_total': np.random.normal(0.8, 0.3, n_samples),
-        'bilirubin_direct': np.random.normal(0.2, 0.1, n_samples),
-        'bilirubin_indirect': np.random.normal(0.6, 0.2, n_samples),
-        'creatinine': np.random.normal(0.9, 0.2, n_samples),
-        'bun': np.random.normal(15, 5, n_samples),
-        'sodium_level': np.random.normal(140, 3, n_samples),
-        'potassium_level': np.random.normal(4.0, 0.5, n_samples),
-        'chloride_level': np.random.normal(102, 3, n_samples),
-        'calcium_level': np.random.normal(9.5, 0.5, n_samples),
-        'protein_total': np.random.normal(7.0, 0.5, n_samples),
-        'albumin': np.random.normal(4.0, 0.4, n_samples),
-        'globulin': np.random.normal(3.0, 0.4, n_samples),
-        'ag_ratio': np.random.normal(1.3, 0.2, n_samples),
-        'tsh': np.random.normal(2.5, 1.0, n_samples),
-    }
-    
-    df = pd.DataFrame(data)
+    # Draw all parameters as one (n_samples, 26) float32 block, scaled per column
+    X = rng.standard_normal((n_samples, len(SAMPLE_COLUMNS)), dtype=np.float32) * SAMPLE_STDS + SAMPLE_MEANS
     
-    # Create target labels based on abnormalities
-    conditions = []
-    for idx, row in df.iterrows():
-        if row['hemoglobin'] < 12:
-            conditions.append('ANEMIA')
-        elif row['glucose'] > 140:
-            conditions.append('DIABETES')
-        elif row['alt'] > 56 or row['ast'] > 40:
-            conditions.append('LIVER_DISEASE')
-        elif row['creatinine'] > 1.3:
-            conditions.append('KIDNEY_DISEASE')
-        elif row['tsh'] > 4.0:
-            conditions.append('THYROID_DISORDER')
-        else:
-            conditions.append('NORMAL')
+    # Create target labels based on abnormalities; first matching rule wins
+    if njit is not None:
+        codes = np.empty(n_samples, dtype=np.uint8)
+        _label_rows(X[:, HGB], X[:, GLU], X[:, ALT], X[:, AST], X[:, CREAT], X[:, TSH], codes)
+        labels = SAMPLE_LABELS[codes]
+    else:
+        labels = np.select(
+            [
+                X[:, HGB] < 12,
+                X[:, GLU] > 140,
+                (X[:, ALT] > 56) | (X[:, AST] > 40),
+                X[:, CREAT] > 1.3,
+                X[:, TSH] > 4.0,
+            ],
+            SAMPLE_LABELS[:-1],
+            default=SAMPLE_LABELS[-1]
+        )
     
-    df['condition'] = conditions
+    # Wrap in a DataFrame only at the end, for model.train
+    df = pd.DataFrame(X, columns=SAMPLE_COLUMNS)
+    df['condition'] = labels
     return df
 
 if __name__ == "__main__":
@@ -74,7 +111,7 @@ if __name__ == "__main__":
     
     print("🔄 Training ML model...")
     # Train model
-    results = blood_analysis_model.train(X, y)
+    results = get_model().train(X, y)
     print("✅ Model training completed!")
     print(f"📊 Accuracy: {results['accuracy']:.4f}")
     print(f"🔧 Features used: {results['features_used']}")
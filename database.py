@@ -1,33 +1,85 @@
-import oracledb
 from contextlib import contextmanager
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 from config import config
+import oracledb
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fetch CLOB/BLOB columns as str/bytes in the row instead of a LOB locator round trip each
+oracledb.defaults.fetch_lobs = False
+
 class Database:
     def __init__(self):
         self.dsn = f"{config.DB_HOST}:{config.DB_PORT}/{config.DB_SERVICE}"
-        logger.info(f"Database DSN: {self.dsn}")
+        logger.info("Database DSN: %s", self.dsn)
+        
+        # Created on first use so importing this module opens no sessions
+        self.pool = None
+        self.engine = None
+        self.SessionLocal = None
+        self._lock = threading.Lock()
+    
+    def _ensure_pool(self):
+        """Create the pool, engine and session factory once; return the session factory"""
+        if self.SessionLocal is not None:
+            return self.SessionLocal
+        with self._lock:
+            if self.SessionLocal is None:
+                self._create_pool()
+        return self.SessionLocal
+    
+    def _create_pool(self):
+        # Oracle session pool: authenticate once and reuse sessions across requests
+        self.pool = oracledb.create_pool(
+            user=config.DB_USERNAME,
+            password=config.DB_PASSWORD,
+            dsn=self.dsn,
+            min=config.DB_POOL_MIN,
+            max=config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW,
+            increment=1,
+            getmode=oracledb.POOL_GETMODE_WAIT
+        )
+        
+        # Engine borrows connections from the Oracle pool; closing one releases it back
+        self.engine = create_engine(
+            "oracle+oracledb://",
+            creator=self.pool.acquire,
+            poolclass=NullPool
+        )
+        
+        # Thread-local sessions: queries within one unit of work share a session and connection
+        self.SessionLocal = scoped_session(sessionmaker(bind=self.engine, autoflush=False))
+    
+    def close(self):
+        """Close the pool and its sessions; the next get_connection creates a new one"""
+        with self._lock:
+            if self.SessionLocal is None:
+                return
+            self.SessionLocal.remove()
+            self.engine.dispose()
+            self.pool.close(force=True)
+            self.pool = self.engine = self.SessionLocal = None
+            logger.info("Database pool closed")
     
     @contextmanager
     def get_connection(self):
-        connection = None
+        session_factory = self._ensure_pool()
+        session = None
         try:
-            connection = oracledb.connect(
-                user=config.DB_USERNAME,
-                password=config.DB_PASSWORD,
-                dsn=self.dsn
-            )
-            logger.info("✅ Database connection established")
-            yield connection
+            session = session_factory()
+            yield session
         except Exception as e:
-            logger.error(f"❌ Database connection failed: {e}")
+            logger.error("❌ Database connection failed: %s", e)
             raise
         finally:
-            if connection:
-                connection.close()
-                logger.debug("Database connection closed")
+            if session is not None:
+                # Rolls back anything uncommitted and returns the connection to the pool
+                session_factory.remove()
+                logger.debug("Database session released")
 
 # Global database instance
 db = Database()
@@ -36,13 +88,15 @@ def init_db():
     """Initialize database connection and verify"""
     try:
         with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM DUAL")
-            result = cursor.fetchone()
+            result = conn.execute(text("SELECT 1 FROM DUAL")).fetchone()
             if result and result[0] == 1:
                 logger.info("✅ Database connection verified successfully")
             else:
                 raise Exception("Database verification failed")
     except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
-        raise
\ No newline at end of file
+        logger.error("❌ Database initialization failed: %s", e)
+        raise
+
+def close_db():
+    """Close the database pool on shutdown"""
+    db.close()
\ No newline at end of file
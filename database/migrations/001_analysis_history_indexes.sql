@@ -0,0 +1,4 @@
+-- Indexes for per-user analysis history lookups
+-- ONLINE builds avoid blocking DML on existing deployments
+CREATE INDEX ix_patients_user ON patients (user_id) ONLINE;
+CREATE INDEX ix_ar_patient_date ON analysis_results (patient_id, analysis_date DESC) ONLINE;
\ No newline at end of file
@@ -0,0 +1,5 @@
+-- Composite index matching get_patients (WHERE user_id = ... ORDER BY created_at DESC);
+-- it also covers user_id-only lookups, so it replaces ix_patients_user.
+-- users.username/email are already indexed by their UNIQUE constraints.
+CREATE INDEX ix_patients_user_created ON patients (user_id, created_at DESC) ONLINE;
+DROP INDEX ix_patients_user ONLINE;
\ No newline at end of file
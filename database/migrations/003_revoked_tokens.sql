@@ -0,0 +1,6 @@
+-- Access tokens revoked by /auth/logout, checked on every authenticated request.
+-- Rows only matter until the token's own expiry; logout deletes the expired ones.
+CREATE TABLE revoked_tokens (
+    token_digest RAW(16) PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL
+);
\ No newline at end of file
@@ -67,6 +67,11 @@ CREATE TABLE analysis_results (
     raw_text CLOB
 );
 
+-- Indexes for per-user patient and analysis history lookups
+-- (users.username/email are already indexed by their UNIQUE constraints)
+CREATE INDEX ix_patients_user_created ON patients (user_id, created_at DESC);
+CREATE INDEX ix_ar_patient_date ON analysis_results (patient_id, analysis_date DESC);
+
 -- Diseases table
 CREATE TABLE diseases (
     disease_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
@@ -106,6 +111,12 @@ CREATE TABLE users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Revoked access tokens (logout); expires_at is the token's own expiry in UTC
+CREATE TABLE revoked_tokens (
+    token_digest RAW(16) PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL
+);
+
 -- Analysis history table
 CREATE TABLE analysis_history (
     history_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
@@ -20,23 +20,33 @@ def init_database():
         print("✅ Database connection established!")
         print(f"Oracle Version: {connection.version}")
         
+        # DDL commits implicitly; the sample rows are committed once at the end
+        connection.autocommit = False
         cursor = connection.cursor()
         
         # Create tables (same as before)
         print("Creating tables...")
         
-        # Patients table
+        # Drop existing tables in one PL/SQL round trip, ignoring "table does not exist"
         cursor.execute("""
+            DECLARE
+                TYPE name_list IS TABLE OF VARCHAR2(30);
+                tables name_list := name_list('blood_test_results', 'patients', 'users');
             BEGIN
-                EXECUTE IMMEDIATE 'DROP TABLE patients CASCADE CONSTRAINTS';
-            EXCEPTION
-                WHEN OTHERS THEN
-                    IF SQLCODE != -942 THEN
-                        RAISE;
-                    END IF;
+                FOR i IN 1 .. tables.COUNT LOOP
+                    BEGIN
+                        EXECUTE IMMEDIATE 'DROP TABLE ' || tables(i) || ' CASCADE CONSTRAINTS';
+                    EXCEPTION
+                        WHEN OTHERS THEN
+                            IF SQLCODE != -942 THEN
+                                RAISE;
+                            END IF;
+                    END;
+                END LOOP;
             END;
         """)
         
+        # Patients table
         cursor.execute("""
             CREATE TABLE patients (
                 patient_id VARCHAR2(20) PRIMARY KEY,
@@ -52,17 +62,6 @@ def init_database():
         print("✅ Patients table created")
         
         # Blood test results table
-        cursor.execute("""
-            BEGIN
-                EXECUTE IMMEDIATE 'DROP TABLE blood_test_results CASCADE CONSTRAINTS';
-            EXCEPTION
-                WHEN OTHERS THEN
-                    IF SQLCODE != -942 THEN
-                        RAISE;
-                    END IF;
-            END;
-        """)
-        
         cursor.execute("""
             CREATE TABLE blood_test_results (
                 result_id VARCHAR2(20) PRIMARY KEY,
@@ -91,17 +90,6 @@ def init_database():
         print("✅ Blood test results table created")
         
         # Users table
-        cursor.execute("""
-            BEGIN
-                EXECUTE IMMEDIATE 'DROP TABLE users CASCADE CONSTRAINTS';
-            EXCEPTION
-                WHEN OTHERS THEN
-                    IF SQLCODE != -942 THEN
-                        RAISE;
-                    END IF;
-            END;
-        """)
-        
         cursor.execute("""
             CREATE TABLE users (
                 user_id VARCHAR2(20) PRIMARY KEY,
@@ -125,10 +113,16 @@ def init_database():
             ('P-003', 'Robert Johnson', 58, 'Male', '+1122334455', 'robert.johnson@email.com', '789 Pine Rd, Village')
         ]
         
+        # Declare bind types up front (matching the column sizes) so rows go as one array DML
+        cursor.setinputsizes(20, 100, oracledb.DB_TYPE_NUMBER, 10, 15, 100, oracledb.DB_TYPE_CLOB)
         cursor.executemany("""
             INSERT INTO patients (patient_id, name, age, gender, contact_number, email, address)
             VALUES (:1, :2, :3, :4, :5, :6, :7)
-        """, sample_patients)
+        """, sample_patients, batcherrors=True, arraydmlrowcounts=True)
+        
+        for error in cursor.getbatcherrors():
+            print(f"⚠️ Row {error.offset}: {error.message}")
+        print(f"Rows inserted: {sum(cursor.getarraydmlrowcounts())}")
         
         connection.commit()
         print("✅ Sample data inserted")
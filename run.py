@@ -1,6 +1,6 @@
+import os
 import uvicorn
-from app.main import app
-from database import init_db
+from config import config
 import logging
 
 # Configure logging
@@ -17,20 +17,24 @@ logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
     try:
-        # Initialize database connection
+        # Each worker connects to the database in the app's startup hook,
+        # so no pool is created here and shared across worker processes
         logger.info("🚀 Starting Blood Analysis System...")
-        init_db()
-        logger.info("✅ Database initialized successfully")
         
-        # Start the server
-        logger.info("🌐 Starting FastAPI server...")
+        # Start the server: auto-reload in debug, one worker per core otherwise
+        # ("auto" picks uvloop/httptools when installed, falling back on Windows)
+        workers = 1 if config.DEBUG else (os.cpu_count() or 1)
+        logger.info("🌐 Starting FastAPI server with %d worker(s)...", workers)
         uvicorn.run(
             "app.main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
+            host=config.API_HOST,
+            port=config.API_PORT,
+            reload=config.DEBUG,
+            workers=workers,
+            loop="auto",
+            http="auto",
             log_level="info",
-            access_log=True
+            access_log=config.DEBUG
         )
     except Exception as e:
         logger.error(f"❌ Failed to start server: {e}")
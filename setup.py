@@ -6,8 +6,8 @@ import platform
 def check_python_version():
     """Check if Python version is compatible"""
     version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print("❌ Python 3.8 or higher is required")
+    if version.major < 3 or (version.major == 3 and version.minor < 10):
+        print("❌ Python 3.10 or higher is required")
         return False
     print(f"✅ Python {version.major}.{version.minor}.{version.micro} detected")
     return True
@@ -23,6 +23,15 @@ def install_requirements():
         print(f"❌ Failed to install dependencies: {e}")
         return False
 
+def install_speedups():
+    """Install the optional accelerators; the app falls back without them"""
+    print("⚡ Installing optional speedups...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements-speedups.txt"])
+        print("✅ Speedups installed successfully")
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️  Speedups not installed, using the slower fallbacks: {e}")
+
 def download_spacy_model():
     """Download spaCy model"""
     print("🔤 Downloading spaCy English model...")
@@ -180,6 +189,9 @@ def main():
     if not install_requirements():
         print("⚠️  Some dependencies may not have installed correctly")
     
+    # Optional accelerators (Aho-Corasick/Hyperscan matching, ONNX inference, numba labelling)
+    install_speedups()
+    
     # Download spaCy model
     download_spacy_model()
     
@@ -1,19 +1,25 @@
 import argparse
 import logging
-import pandas as pd
+from collections import Counter
 import numpy as np
 import os
+import hashlib
 import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from joblib import Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
+from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
-import cv2
-import pytesseract
-from PIL import Image
 import re
+import string
 from config import config
 
+try:
+    from tesserocr import PyTessBaseAPI, OEM
+except ImportError:
+    PyTessBaseAPI = None  # Optional; falls back to one pytesseract subprocess per call
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,10 +32,69 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Numbers (integer or decimal)
+_NUMBER_RE = re.compile(r'\d+\.\d+|\d+')
+
+# Blood report image types picked up from the dataset directory
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif')
+
+def _iter_images(root):
+    """Yield image file paths under root as they are found (depth-first, symlinked dirs not followed)"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(_IMAGE_EXTENSIONS):
+                    yield entry.path
+
+# Synthetic samples added when too few real reports could be extracted
+_SYNTHETIC_FALLBACK_SAMPLES = 500
+
+# OCR text is cached here per image content so repeat training runs skip Tesseract
+_OCR_CACHE_DIR = os.path.join('.cache', 'ocr')
+
+# str.translate table that deletes ASCII letters and digits, used to count them in one C-level pass
+_DELETE_ALNUM = str.maketrans('', '', string.ascii_letters + string.digits)
+
+# Images below either threshold are treated as having no text and never reach Tesseract
+_MIN_EDGE_ENERGY = 50.0  # Variance of the Laplacian
+_MIN_CONTRAST = 20.0     # Grayscale standard deviation
+
+# OCR output at least this long and alphanumeric-dense is accepted without trying further variants
+_OCR_GOOD_SCORE = 0.7
+_OCR_GOOD_LENGTH = 200
+
+def _is_good_enough_ocr(text, score):
+    """True when OCR text is confident and long enough to skip the remaining variants/configs"""
+    return score > _OCR_GOOD_SCORE and len(text) > _OCR_GOOD_LENGTH
+
+# OpenCV, pytesseract and PIL are imported inside the OCR helpers: they are slow to import and
+# unused when training falls back to synthetic data or the script only prints --help
+
+# Tesseract API handle, created lazily once per (worker) process and reused across images
+_tess_api = None
+
+def _ocr_image(image, psm):
+    """OCR a grayscale/binary image with the given page segmentation mode"""
+    global _tess_api
+    if PyTessBaseAPI is None:
+        import pytesseract
+        return pytesseract.image_to_string(image, config=f'--oem 3 --psm {psm}')
+    
+    from PIL import Image
+    
+    if _tess_api is None:
+        _tess_api = PyTessBaseAPI(oem=OEM.DEFAULT)
+    # Set the mode before the image: SetImage clears the previous recognition result
+    _tess_api.SetPageSegMode(psm)
+    _tess_api.SetImage(Image.fromarray(image))
+    return _tess_api.GetUTF8Text()
+
 class EnhancedBloodAnalysisModel:
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
         self.is_trained = False
         
@@ -70,6 +135,14 @@ class EnhancedBloodAnalysisModel:
             'MFR': [r'MFR', r'Medium Fluorescence Reticulocytes?'],
             'HFR': [r'HFR', r'High Fluorescence Reticulocytes?']
         }
+        # All aliases fused into one case-insensitive alternation, longest first so e.g. MCHC
+        # wins over MCH; the matched group's index maps back to its parameter
+        aliases = sorted(
+            ((param_name, pattern) for param_name, patterns in self.parameter_patterns.items() for pattern in patterns),
+            key=lambda alias: len(alias[1]), reverse=True
+        )
+        self._alias_params = [param_name for param_name, _ in aliases]
+        self._combined_re = re.compile('|'.join(f'({pattern})' for _, pattern in aliases), re.IGNORECASE)
 
         # Normal ranges for validation
         self.normal_ranges = {
@@ -84,22 +157,68 @@ class EnhancedBloodAnalysisModel:
             'LFR': (87.0, 91.4), 'MFR': (11.0, 18.0), 'HFR': (0.0, 1.7)
         }
 
+        # Missing parameters are imputed with their normal range midpoint (0.0 if no range)
+        self._param_index = {name: i for i, name in enumerate(self.parameter_names)}
+        self._default_features = np.array([
+            sum(self.normal_ranges.get(name, (0.0, 0.0))) / 2 for name in self.parameter_names
+        ])
+
+        # Disease patterns for synthetic data; parameters not listed use the normal range
+        self.synthetic_disease_patterns = {
+            'Normal': {
+                'WBC': (4.5, 10.0), 'RBC': (4.2, 5.4), 'HGB': (12.0, 16.0),
+                'HCT': (36.1, 44.3), 'PLT': (150, 400)
+            },
+            'Iron Deficiency Anemia': {
+                'HGB': (8.0, 11.9), 'MCV': (60.0, 79.9), 'MCH': (20.0, 26.9),
+                'MCHC': (30.0, 32.9), 'RDW_CV': (15.0, 20.0)
+            },
+            'Vitamin B12 Deficiency': {
+                'HGB': (8.0, 11.9), 'MCV': (100.1, 120.0), 'MCH': (31.1, 35.0),
+                'RDW_CV': (15.0, 20.0)
+            },
+            'Thrombocytopenia': {
+                'PLT': (50.0, 149.9), 'MPV': (11.6, 15.0)
+            },
+            'Leukocytosis': {
+                'WBC': (10.1, 30.0), 'NEUT': (8.1, 15.0)
+            }
+        }
+        self.synthetic_diseases = list(self.synthetic_disease_patterns)
+
+        # (n_diseases, 26) low/high tables in parameter_names order, built once
+        normal_bounds = [self.normal_ranges.get(name, (0.0, 0.0)) for name in self.parameter_names]
+        bounds = np.array([
+            [pattern.get(name, normal) for name, normal in zip(self.parameter_names, normal_bounds)]
+            for pattern in self.synthetic_disease_patterns.values()
+        ], dtype=float)
+        self._synthetic_low = bounds[:, :, 0]
+        self._synthetic_high = bounds[:, :, 1]
+
     def enhanced_preprocess_image(self, image_path):
         """Enhanced image preprocessing for better OCR"""
         try:
-            # Read image
-            image = cv2.imread(image_path)
-            if image is None:
+            import cv2
+            
+            # Read image straight to grayscale; every variant below works on one channel
+            gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if gray is None:
                 logger.warning(f"Could not read image: {image_path}")
                 return None
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # Cheap text-likeness gate: flat or blurry images (photos, logos, blank scans)
+            # have little edge energy or contrast, so skip the Tesseract passes for them
+            edge_energy = cv2.Laplacian(gray, cv2.CV_32F).var()
+            contrast = gray.std()
+            if edge_energy < _MIN_EDGE_ENERGY or contrast < _MIN_CONTRAST:
+                logger.info(f"Skipping non-document image {image_path} "
+                            f"(edge energy {edge_energy:.1f}, contrast {contrast:.1f})")
+                return None
             
             # Try multiple preprocessing techniques
             processed_images = []
             
-            # 1. Simple threshold
+            # 1. Simple threshold (first; usually the best variant on clean scans)
             _, thresh1 = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             processed_images.append(thresh1)
             
@@ -113,11 +232,6 @@ class EnhancedBloodAnalysisModel:
             _, thresh3 = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             processed_images.append(thresh3)
             
-            # 4. Morphological operations to clean image
-            kernel = np.ones((1,1), np.uint8)
-            opening = cv2.morphologyEx(thresh1, cv2.MORPH_OPEN, kernel)
-            processed_images.append(opening)
-            
             return processed_images
             
         except Exception as e:
@@ -133,25 +247,25 @@ class EnhancedBloodAnalysisModel:
             if not processed_images:
                 return ""
             
-            # Try different OCR configurations
-            ocr_configs = [
-                r'--oem 3 --psm 6',      # Uniform block of text
-                r'--oem 3 --psm 4',      # Single column of text
-                r'--oem 3 --psm 8',      # Single word
-                r'--oem 3 --psm 11',     # Sparse text
-                r'--oem 3 --psm 12',     # Sparse text with OSD
+            # Try different page segmentation modes (PSM 6 first; it wins most often on clean reports)
+            ocr_psms = [
+                6,      # Uniform block of text
+                4,      # Single column of text
+                8,      # Single word
+                11,     # Sparse text
+                12,     # Sparse text with OSD
             ]
             
             best_text = ""
             best_score = 0
             
             for i, processed_img in enumerate(processed_images):
-                for config in ocr_configs:
+                for psm in ocr_psms:
                     try:
-                        text = pytesseract.image_to_string(processed_img, config=config)
+                        text = _ocr_image(processed_img, psm)
                         
                         # Score text quality (more alphanumeric = better)
-                        alpha_count = len(re.findall(r'[a-zA-Z0-9]', text))
+                        alpha_count = len(text) - len(text.translate(_DELETE_ALNUM))
                         total_chars = len(text.strip())
                         
                         if total_chars > 0:
@@ -163,8 +277,15 @@ class EnhancedBloodAnalysisModel:
                                 best_score = score
                                 
                     except Exception as e:
-                        logger.debug(f"OCR config {config} failed for image {i}: {e}")
+                        logger.debug(f"OCR PSM {psm} failed for image {i}: {e}")
                         continue
+                    
+                    if _is_good_enough_ocr(best_text, best_score):
+                        break
+                
+                # Stop trying variants once a confident, substantial read is in hand
+                if _is_good_enough_ocr(best_text, best_score):
+                    break
             
             if best_text:
                 logger.info(f"✅ Extracted {len(best_text)} characters from {os.path.basename(image_path)}")
@@ -185,43 +306,43 @@ class EnhancedBloodAnalysisModel:
             return parameters
             
         lines = text.split('\n')
+        # First plausible number on each line, found once per document
+        line_values = [self._extract_number_from_text(line) for line in lines]
         
-        for param_name, patterns in self.parameter_patterns.items():
-            param_value = None
-            
-            for pattern in patterns:
-                for i, line in enumerate(lines):
-                    # More flexible matching
-                    if re.search(pattern, line, re.IGNORECASE):
-                        # Look for value in format: "Parameter: 12.34" or "12.34" near parameter
-                        value = self._extract_number_enhanced(line, lines, i)
-                        if value is not None:
-                            param_value = value
-                            break
-                        
-                if param_value is not None:
-                    break
-            
-            if param_value is not None:
-                parameters[param_name] = param_value
-                logger.debug(f"Extracted {param_name}: {param_value}")
+        # Scan each line once; the first line naming a parameter with a usable value wins
+        for i, line in enumerate(lines):
+            line_value = None
+            for match in self._combined_re.finditer(line):
+                param_name = self._alias_params[match.lastindex - 1]
+                if param_name in parameters:
+                    continue
+                # Look for value in format: "Parameter: 12.34" or "12.34" near parameter
+                if line_value is None:
+                    line_value = self._extract_number_enhanced(line_values, i)
+                    if line_value is None:
+                        break
+                parameters[param_name] = line_value
+                logger.debug(f"Extracted {param_name}: {line_value}")
+            
+            if len(parameters) == len(self.parameter_patterns):
+                break
         
         logger.info(f"Extracted {len(parameters)} parameters from text")
         return parameters
 
-    def _extract_number_enhanced(self, current_line, all_lines, current_index):
-        """Enhanced number extraction from text"""
+    def _extract_number_enhanced(self, line_values, current_index):
+        """Enhanced number extraction from precomputed per-line values"""
         # Check current line
-        value = self._extract_number_from_text(current_line)
+        value = line_values[current_index]
         if value is not None:
             return value
         
         # Check surrounding lines (2 lines before and after)
-        search_range = range(max(0, current_index-2), min(len(all_lines), current_index+3))
+        search_range = range(max(0, current_index-2), min(len(line_values), current_index+3))
         
         for i in search_range:
             if i != current_index:  # Don't check the same line again
-                value = self._extract_number_from_text(all_lines[i])
+                value = line_values[i]
                 if value is not None:
                     return value
         
@@ -230,11 +351,9 @@ class EnhancedBloodAnalysisModel:
     def _extract_number_from_text(self, text):
         """Extract numerical value from text"""
         try:
-            # Remove commas and special characters, keep dots for decimals
-            clean_text = re.sub(r'[^\d.]', ' ', text)
-            
-            # Look for numbers with possible decimal points
-            numbers = re.findall(r'\d+\.\d+|\d+', clean_text)
+            # Look for numbers with possible decimal points (other characters can't be part of a match,
+            # so no separate cleanup pass is needed)
+            numbers = _NUMBER_RE.findall(text)
             
             for num in numbers:
                 try:
@@ -254,130 +373,133 @@ class EnhancedBloodAnalysisModel:
         """Generate synthetic training data when real data extraction fails"""
         logger.info(f"Generating {num_samples} synthetic blood reports for training...")
         
-        features_list = []
-        labels_list = []
-        
-        # Disease patterns for synthetic data
-        disease_patterns = {
-            'Normal': {
-                'WBC': (4.5, 10.0), 'RBC': (4.2, 5.4), 'HGB': (12.0, 16.0),
-                'HCT': (36.1, 44.3), 'PLT': (150, 400)
-            },
-            'Iron Deficiency Anemia': {
-                'HGB': (8.0, 11.9), 'MCV': (60.0, 79.9), 'MCH': (20.0, 26.9),
-                'MCHC': (30.0, 32.9), 'RDW_CV': (15.0, 20.0)
-            },
-            'Vitamin B12 Deficiency': {
-                'HGB': (8.0, 11.9), 'MCV': (100.1, 120.0), 'MCH': (31.1, 35.0),
-                'RDW_CV': (15.0, 20.0)
-            },
-            'Thrombocytopenia': {
-                'PLT': (50.0, 149.9), 'MPV': (11.6, 15.0)
-            },
-            'Leukocytosis': {
-                'WBC': (10.1, 30.0), 'NEUT': (8.1, 15.0)
-            }
-        }
-        
-        np.random.seed(42)
+        # Split the samples across diseases (or normal), draw each disease's rows as one
+        # contiguous block from its (low, high) row, then shuffle rows and labels together
+        rng = np.random.default_rng(42)
+        n_diseases = len(self.synthetic_diseases)
+        disease_counts = rng.multinomial(num_samples, [1 / n_diseases] * n_diseases)
+        features = np.empty((num_samples, len(self.parameter_names)))
+        start = 0
+        for d, count in enumerate(disease_counts):
+            features[start:start + count] = rng.uniform(
+                self._synthetic_low[d], self._synthetic_high[d], size=(count, len(self.parameter_names))
+            )
+            start += count
         
-        for _ in range(num_samples):
-            # Choose a random disease or normal
-            disease = np.random.choice(list(disease_patterns.keys()))
-            pattern = disease_patterns[disease]
-            
-            features = np.full(26, 0.0)
-            
-            for i, param_name in enumerate(self.parameter_names):
-                if param_name in pattern:
-                    # Generate value within disease range
-                    min_val, max_val = pattern[param_name]
-                    value = np.random.uniform(min_val, max_val)
-                else:
-                    # Generate normal value
-                    if param_name in self.normal_ranges:
-                        min_val, max_val = self.normal_ranges[param_name]
-                        value = np.random.uniform(min_val, max_val)
-                    else:
-                        value = 0.0
-                
-                features[i] = value
-            
-            features_list.append(features)
-            labels_list.append(disease)
+        order = rng.permutation(num_samples)
+        features = features[order]
+        labels_list = np.repeat(self.synthetic_diseases, disease_counts)[order].tolist()
         
-        return np.array(features_list), labels_list
+        return features, labels_list
 
     def prepare_features(self, parameters):
         """Prepare feature vector with all 26 parameters"""
-        feature_vector = np.full(26, 0.0)
-        
-        for i, param_name in enumerate(self.parameter_names):
-            if param_name in parameters:
-                feature_vector[i] = parameters[param_name]
-            else:
-                # Impute missing values with normal range median
-                if param_name in self.normal_ranges:
-                    min_val, max_val = self.normal_ranges[param_name]
-                    feature_vector[i] = (min_val + max_val) / 2
+        # Start from the normal-range midpoints and overwrite the provided parameters
+        feature_vector = self._default_features.copy()
+        provided = [(self._param_index[name], value) for name, value in parameters.items() if name in self._param_index]
+        if provided:
+            idx, values = zip(*provided)
+            feature_vector[list(idx)] = values
         
         return feature_vector
 
+    def prepare_features_batch(self, parameters_list):
+        """Prepare an (N, 26) feature matrix from a list of parameter dicts"""
+        features = np.tile(self._default_features, (len(parameters_list), 1))
+        rows, cols, values = [], [], []
+        for row, parameters in enumerate(parameters_list):
+            for name, value in parameters.items():
+                col = self._param_index.get(name)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(value)
+        features[rows, cols] = values
+        
+        return features
+
     def process_dataset(self, dataset_path):
         """Process dataset with fallback to synthetic data"""
-        features_list = []
-        labels_list = []
-        successful_extractions = 0
+        results = []
         
         # Try to process real images first
         if os.path.exists(dataset_path):
             logger.info(f"Attempting to process real images from: {dataset_path}")
             
-            # Find all image files
-            supported_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif']
-            image_files = []
-            
-            for root, dirs, files in os.walk(dataset_path):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in supported_extensions):
-                        image_files.append(os.path.join(root, file))
-            
-            logger.info(f"Found {len(image_files)} image files")
+            # OCR each image in its own worker process as it is discovered; Tesseract calls
+            # dominate and are independent
+            results = Parallel(n_jobs=-1, backend='loky', batch_size='auto', verbose=5)(
+                delayed(self._process_one)(image_path) for image_path in _iter_images(dataset_path)
+            )
             
-            for i, image_path in enumerate(image_files):
-                if i % 10 == 0:
-                    logger.info(f"Processed {i}/{len(image_files)} images...")
-                
-                try:
-                    # Extract text and parameters
-                    text = self.extract_text_from_image(image_path)
-                    parameters = self.extract_parameters_from_text(text)
-                    
-                    if len(parameters) >= 3:  # Require at least 3 parameters
-                        # Generate synthetic label based on parameters
-                        label = self._generate_label_from_parameters(parameters)
-                        
-                        # Prepare features
-                        features = self.prepare_features(parameters)
-                        
-                        features_list.append(features)
-                        labels_list.append(label)
-                        successful_extractions += 1
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to process {image_path}: {e}")
-                    continue
+            logger.info(f"Processed {len(results)} image files")
+        
+        # Preallocate room for every image plus the synthetic fallback and fill rows in place
+        capacity = len(results) + _SYNTHETIC_FALLBACK_SAMPLES
+        features = np.empty((capacity, len(self.parameter_names)), dtype=np.float32)
+        labels = [None] * capacity
+        n = 0
+        
+        for result in results:
+            if result is not None:
+                features[n], labels[n] = result
+                n += 1
+        successful_extractions = n
         
         # If no real data extracted, use synthetic data
         if successful_extractions < 50:  # If less than 50 successful extractions
             logger.warning(f"Only {successful_extractions} real samples extracted. Using synthetic data...")
-            synthetic_features, synthetic_labels = self.generate_synthetic_data(500)
-            features_list.extend(synthetic_features)
-            labels_list.extend(synthetic_labels)
+            synthetic_features, synthetic_labels = self.generate_synthetic_data(_SYNTHETIC_FALLBACK_SAMPLES)
+            features[n:n + _SYNTHETIC_FALLBACK_SAMPLES] = synthetic_features
+            labels[n:n + _SYNTHETIC_FALLBACK_SAMPLES] = synthetic_labels
+            n += _SYNTHETIC_FALLBACK_SAMPLES
             logger.info(f"Added {len(synthetic_features)} synthetic samples")
         
-        logger.info(f"Total training samples: {len(features_list)}")
-        return np.array(features_list), labels_list
+        logger.info(f"Total training samples: {n}")
+        return features[:n], labels[:n]
+
+    def _process_one(self, image_path):
+        """OCR one image and return (features, label), or None if too few parameters were found"""
+        # One OpenCV thread per worker so parallel workers don't oversubscribe the cores
+        import cv2
+        cv2.setNumThreads(1)
+        try:
+            # Extract text (cached by image content) and parameters
+            text = self._extract_text_cached(image_path)
+            parameters = self.extract_parameters_from_text(text)
+            
+            if len(parameters) >= 3:  # Require at least 3 parameters
+                # Generate synthetic label based on parameters
+                label = self._generate_label_from_parameters(parameters)
+                
+                # Prepare features
+                return self.prepare_features(parameters), label
+                
+        except Exception as e:
+            logger.warning(f"Failed to process {image_path}: {e}")
+        
+        return None
+
+    def _extract_text_cached(self, image_path):
+        """OCR an image, reusing text cached on disk under a hash of the image bytes"""
+        with open(image_path, 'rb') as f:
+            key = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        cache_path = os.path.join(_OCR_CACHE_DIR, f'{key}.pkl')
+        
+        if os.path.exists(cache_path):
+            try:
+                return joblib.load(cache_path)
+            except Exception as e:
+                logger.debug(f"Ignoring unreadable OCR cache entry {cache_path}: {e}")
+        
+        text = self.extract_text_from_image(image_path)
+        
+        # Write to a worker-unique temp file and rename so concurrent workers never see a partial entry
+        os.makedirs(_OCR_CACHE_DIR, exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        joblib.dump(text, tmp_path, compress=3)
+        os.replace(tmp_path, cache_path)
+        return text
 
     def _generate_label_from_parameters(self, parameters):
         """Generate label based on parameter patterns"""
@@ -416,7 +538,7 @@ class EnhancedBloodAnalysisModel:
                 return False
             
             logger.info(f"Training on {len(X)} samples with {len(set(y))} classes")
-            logger.info(f"Class distribution: {dict(pd.Series(y).value_counts())}")
+            logger.info(f"Class distribution: {dict(Counter(y).most_common())}")
             
             # Encode labels
             y_encoded = self.label_encoder.fit_transform(y)
@@ -428,27 +550,23 @@ class EnhancedBloodAnalysisModel:
             
             logger.info(f"Training set: {X_train.shape[0]}, Test set: {X_test.shape[0]}")
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            # Train Random Forest model
-            self.model = RandomForestClassifier(
-                n_estimators=100,  # Reduced for faster training
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
+            # Train histogram gradient boosting model (features are binned once, no bootstrap per tree)
+            self.model = HistGradientBoostingClassifier(
+                max_iter=200,
+                max_depth=8,
+                learning_rate=0.1,
+                early_stopping=True,
+                validation_fraction=0.1,
                 random_state=42,
-                n_jobs=-1,
                 class_weight='balanced'
             )
             
-            logger.info("Training Random Forest model...")
-            self.model.fit(X_train_scaled, y_train)
+            logger.info("Training HistGradientBoosting model...")
+            self.model.fit(X_train, y_train)
             
             # Evaluate
-            train_score = accuracy_score(y_train, self.model.predict(X_train_scaled))
-            test_score = accuracy_score(y_test, self.model.predict(X_test_scaled))
+            train_score = accuracy_score(y_train, self.model.predict(X_train))
+            test_score = accuracy_score(y_test, self.model.predict(X_test))
             
             logger.info(f"Training accuracy: {train_score:.3f}")
             logger.info(f"Test accuracy: {test_score:.3f}")
@@ -458,7 +576,7 @@ class EnhancedBloodAnalysisModel:
             self.is_trained = True
             
             # Print feature importance
-            self._print_feature_importance()
+            self._print_feature_importance(X_test, y_test)
             
             return True
             
@@ -466,10 +584,14 @@ class EnhancedBloodAnalysisModel:
             logger.error(f"Training failed: {e}")
             return False
 
-    def _print_feature_importance(self):
-        """Print feature importance"""
-        if hasattr(self.model, 'feature_importances_'):
-            importances = self.model.feature_importances_
+    def _print_feature_importance(self, X=None, y=None):
+        """Print feature importance (permutation importance on (X, y) if the model has none built in)"""
+        importances = getattr(self.model, 'feature_importances_', None)
+        if importances is None and X is not None:
+            importances = permutation_importance(
+                self.model, X, y, n_repeats=5, random_state=42, n_jobs=-1
+            ).importances_mean
+        if importances is not None:
             feature_imp = list(zip(self.parameter_names, importances))
             feature_imp.sort(key=lambda x: x[1], reverse=True)
             
@@ -483,12 +605,14 @@ class EnhancedBloodAnalysisModel:
             os.makedirs(os.path.dirname(model_path), exist_ok=True)
             model_data = {
                 'model': self.model,
-                'scaler': self.scaler,
+                'scaler': None,  # Tree models are scale-invariant; key kept for older loaders
                 'label_encoder': self.label_encoder,
                 'parameter_names': self.parameter_names,
                 'is_trained': self.is_trained
             }
-            joblib.dump(model_data, model_path)
+            # Uncompressed so loaders can memory-map the tree arrays:
+            # joblib.load(model_path, mmap_mode='r') shares one page-cached copy across workers
+            joblib.dump(model_data, model_path, compress=0, protocol=4)
             logger.info(f"✅ Model saved to {model_path}")
         except Exception as e:
             logger.error(f"Error saving model: {e}")
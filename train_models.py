@@ -1,24 +1,128 @@
 import argparse
+import hashlib
+import joblib
 import logging
+import numpy as np
 import pandas as pd
-from app.services.ml_models import BloodAnalysisModel
-from app.services.data_preprocessor import DataPreprocessor
+from app.services.data_preprocessor import DataPreprocessor, iter_png_entries
+from app.models.blood_config import ALL_PARAMETERS
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extracted features are reused while the dataset's PNGs (and this version) are unchanged;
+# bump the version when feature extraction changes
+FEATURES_PATH = 'extracted_features.parquet'
+FEATURES_CACHE_VERSION = 1
+
+# Fitted models are memoized on disk, keyed by a signature of the training data and the hyperparameters
+_memory = joblib.Memory(location='.cache', verbose=0)
+
+def _iter_signed_pngs(dataset_path, signatures):
+    """Yield PNG paths under dataset_path, appending each file's relative path|size|mtime to signatures"""
+    for entry in iter_png_entries(dataset_path):
+        st = entry.stat()
+        signatures.append(f'{os.path.relpath(entry.path, dataset_path)}|{st.st_size}|{st.st_mtime_ns}')
+        yield entry.path
+
+def _dataset_cache_key(signatures):
+    """Hash of the PNG signatures from _iter_signed_pngs (in any order), plus the cache version"""
+    h = hashlib.blake2b(f'v{FEATURES_CACHE_VERSION}'.encode(), digest_size=16)
+    for signature in sorted(signatures):
+        h.update(signature.encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+def load_or_extract_features(dataset_path, force_extract=False):
+    """Return the extracted features, re-running extraction only when the dataset changed"""
+    key_path = FEATURES_PATH + '.cache_key'
+    signatures = []
+    
+    if not force_extract and os.path.exists(FEATURES_PATH) and os.path.exists(key_path):
+        # The cached file can only be trusted after a full pass over the tree; keep that pass's
+        # paths so a miss extracts from them instead of walking again
+        image_files = list(_iter_signed_pngs(dataset_path, signatures))
+        with open(key_path) as f:
+            if f.read().strip() == _dataset_cache_key(signatures):
+                logger.info(f"Dataset unchanged; loading cached features from {FEATURES_PATH}")
+                return pd.read_parquet(FEATURES_PATH)
+    else:
+        # Nothing to compare against: sign the files as their paths stream into the pool,
+        # so extraction starts without a separate walk
+        image_files = _iter_signed_pngs(dataset_path, signatures)
+    
+    # Stream rows to disk in row groups so extraction memory stays bounded, then read the compact file back
+    preprocessor = DataPreprocessor()
+    preprocessor.write_dataset_parquet(dataset_path, FEATURES_PATH, image_files=image_files)
+    with open(key_path, 'w') as f:
+        f.write(_dataset_cache_key(signatures))
+    return pd.read_parquet(FEATURES_PATH)
+
+def load_training_data(features_df, labels_csv=None):
+    """Split extracted features into ALL_PARAMETERS columns and labels (labels_csv's filename,label, else rule-based)"""
+    if labels_csv:
+        labels_df = pd.read_csv(labels_csv, usecols=['filename', 'label'])
+        data = features_df.set_index('filename').join(labels_df.set_index('filename'), how='inner')
+        logger.info(f"Matched {len(data)} of {len(features_df)} images to labels in {labels_csv}")
+        y = data['label']
+    else:
+        data = DataPreprocessor().generate_labels_automatically(features_df)
+        y = data['auto_label']
+    
+    # The stratified train/test split needs at least two rows of every label
+    counts = y.value_counts()
+    rare = counts.index[counts < 2]
+    if len(rare):
+        logger.warning(f"Dropping labels with fewer than 2 images: {', '.join(map(str, rare))}")
+        keep = ~y.isin(rare)
+        data, y = data[keep], y[keep]
+    
+    return data[list(ALL_PARAMETERS)], y
+
+def _training_data_signature(X, y):
+    """Content hash of the feature matrix and labels"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+@_memory.cache(ignore=['X', 'y', 'n_jobs', 'model_path'])
+def _train_impl(data_hash, hyperparams, X, y, n_jobs, model_path):
+    """Fit a model and return its fitted state; memoized on the data signature and hyperparams"""
+    from app.services.ml_models import BloodAnalysisModel
+    
+    model = BloodAnalysisModel(model_path, feature_names=ALL_PARAMETERS)
+    model._initialize_new_model(use_hgbt=hyperparams['use_hgbt'])
+    model._set_feature_names(ALL_PARAMETERS)
+    results = model.train(X, y, test_size=hyperparams['test_size'], n_jobs=n_jobs, save=False)
+    return {
+        'feature_importances': results['feature_importances'],
+        'model': model.model,
+        'scaler': model.scaler,
+        'train_median': model._train_median,
+        'feature_names': model.feature_names
+    }
+
 def train_model():
     """Complete training pipeline using all 26 parameters"""
     parser = argparse.ArgumentParser(description='Train blood analysis model with 26 parameters')
     parser.add_argument('--dataset_path', type=str, required=True,
                        help='Path to the dataset directory containing PNG images')
     parser.add_argument('--labels_csv', type=str, default=None,
-                       help='Path to CSV file with manual labels (optional)')
+                       help='Path to CSV file with filename,label columns (optional; rule-based labels otherwise)')
     parser.add_argument('--model_save_path', type=str, default='ml_models/blood_analysis_model.pkl',
                        help='Path to save the trained model')
     parser.add_argument('--extract_features_only', action='store_true',
                        help='Only extract features without training')
+    parser.add_argument('--force_extract', action='store_true',
+                       help='Re-extract features even if the cached extracted_features.parquet is up to date')
+    parser.add_argument('--n_jobs', type=int, default=-1,
+                       help='Parallel jobs for fitting the forest trees (-1 = all cores)')
+    parser.add_argument('--extra_trees', type=int, default=0,
+                       help='Grow the model at --model_save_path by this many trees instead of retraining it')
+    parser.add_argument('--use_hgbt', action='store_true',
+                       help='Train a HistGradientBoostingClassifier instead of the random forest')
     
     args = parser.parse_args()
     
@@ -28,45 +132,56 @@ def train_model():
     
     # Step 1: Extract features from all images
     logger.info("Step 1: Extracting features from all images...")
-    preprocessor = DataPreprocessor()
-    features_df = preprocessor.process_dataset(args.dataset_path, 'extracted_features.csv')
+    features_df = load_or_extract_features(args.dataset_path, args.force_extract)
     
     if args.extract_features_only:
         logger.info("Feature extraction completed. Use --no-extract_features_only to train model.")
         return
     
+    # Deferred so --extract_features_only doesn't pay for importing scikit-learn
+    from app.services.ml_models import BloodAnalysisModel
+    
     # Step 2: Train model
     logger.info("Step 2: Training model with all 26 parameters...")
-    model = BloodAnalysisModel()
+    X, y = load_training_data(features_df, args.labels_csv)
     
     try:
-        model.train(
-            dataset_path=args.dataset_path,
-            labels_csv=args.labels_csv,
-            test_size=0.2
-        )
+        if args.extra_trees and os.path.exists(args.model_save_path):
+            # Warm start: only the new trees are fit; the result depends on the saved model, so skip the cache
+            model = BloodAnalysisModel(args.model_save_path)
+            results = model.train(X, y, test_size=0.2, n_jobs=args.n_jobs, extra_trees=args.extra_trees, save=False)
+            importances = results['feature_importances']
+        else:
+            # A repeat run on unchanged features, labels and hyperparams loads the fit from .cache
+            fitted = _train_impl(
+                _training_data_signature(X, y),
+                {'test_size': 0.2, 'use_hgbt': args.use_hgbt},
+                X,
+                y,
+                args.n_jobs,
+                args.model_save_path
+            )
+            model = BloodAnalysisModel(args.model_save_path, feature_names=ALL_PARAMETERS)
+            model.model = fitted['model']
+            model.scaler = fitted['scaler']
+            model._train_median = fitted['train_median']
+            model._set_feature_names(fitted['feature_names'])
+            model._classes = model.model.classes_.tolist()
+            model.is_trained = True
+            importances = fitted['feature_importances']
         
         # Save the trained model
         model.save_model(args.model_save_path)
         logger.info(f"Model successfully trained and saved to {args.model_save_path}")
         
-        # Print feature importance
-        if hasattr(model.models['rf'], 'feature_importances_'):
-            feature_names = [
-                'WBC', 'RBC', 'HGB', 'HCT', 'MCV', 'MCH', 'MCHC', 'PLT',
-                'RDW_SD', 'RDW_CV', 'PDW', 'MPV', 'P_LCR', 'PCT', 'NEUT',
-                'LYMPH', 'MONO', 'EO', 'BASO', 'IG', 'NRBCS', 'RETICULOCYTES',
-                'IRF', 'LFR', 'MFR', 'HFR'
-            ]
-            importances = model.models['rf'].feature_importances_
-            feature_imp_df = pd.DataFrame({
-                'feature': feature_names,
-                'importance': importances
-            }).sort_values('importance', ascending=False)
-            
-            logger.info("\nTop 10 Most Important Features:")
-            for _, row in feature_imp_df.head(10).iterrows():
-                logger.info(f"  {row['feature']}: {row['importance']:.3f}")
+        # Print feature importance (permutation importance on the held-out split for gradient boosting)
+        # Select the 10 largest without a full sort, then order just those
+        top = np.argpartition(importances, -10)[-10:]
+        top = top[np.argsort(-importances[top])]
+        
+        logger.info("\nTop 10 Most Important Features:")
+        for i in top:
+            logger.info(f"  {model.feature_names[i]}: {importances[i]:.3f}")
         
     except Exception as e:
         logger.error(f"Training failed: {e}")